@@ -0,0 +1,70 @@
+"""
+Microbenchmark: precompiled ERD format registry vs. the stringify/units/icon helper functions.
+
+Renders a sensor's state, units, icon and device class the way `GeErdSensor` used to (through
+`stringify_erd_value`, `get_erd_units` and `get_erd_icon`) and the way it does now (through the
+entity's precompiled `ErdFormat`).  Run from the repository root with Home Assistant and gekitchen
+installed::
+
+    python benchmarks/erd_format_benchmark.py
+"""
+
+import datetime
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from gekitchen import ErdCode, ErdMeasurementUnits, ErdOvenState  # noqa: E402
+from gekitchen.erd_constants import ErdDoorStatus, ErdFilterStatus  # noqa: E402
+from gekitchen.erd_types import FridgeDoorStatus  # noqa: E402
+from homeassistant.const import DEVICE_CLASS_TEMPERATURE  # noqa: E402
+
+from ge_kitchen.entities import (  # noqa: E402
+    TEMPERATURE_ERD_CODES,
+    get_erd_format,
+    get_erd_icon,
+    get_erd_units,
+    stringify_erd_value,
+)
+
+MEASUREMENT_UNITS = ErdMeasurementUnits.IMPERIAL
+SAMPLES = [
+    (ErdCode.CLOCK_TIME, datetime.time(12, 34, 56)),
+    (ErdCode.DOOR_STATUS, FridgeDoorStatus(*([ErdDoorStatus.CLOSED] * 3), ErdDoorStatus.NA, "Closed")),
+    (ErdCode.SABBATH_MODE, False),
+    (ErdCode.UPPER_OVEN_CURRENT_STATE, ErdOvenState.BAKE),
+    (ErdCode.UPPER_OVEN_DISPLAY_TEMPERATURE, 350),
+    (ErdCode.UPPER_OVEN_KITCHEN_TIMER, datetime.timedelta(minutes=12)),
+    (ErdCode.UPPER_OVEN_USER_TEMP_OFFSET, 0),
+    (ErdCode.WATER_FILTER_STATUS, ErdFilterStatus.GOOD),
+]
+FORMATS = [(get_erd_format(erd_code), value) for erd_code, value in SAMPLES]
+
+
+def render_with_functions():
+    for erd_code, value in SAMPLES:
+        units = get_erd_units(erd_code, MEASUREMENT_UNITS)
+        state = stringify_erd_value(erd_code, value, units)
+        get_erd_icon(erd_code, state)
+        DEVICE_CLASS_TEMPERATURE if erd_code in TEMPERATURE_ERD_CODES else None
+
+
+def render_with_formats():
+    for erd_format, value in FORMATS:
+        units = erd_format.units.get(MEASUREMENT_UNITS) if erd_format.units else None
+        state = erd_format.stringify(value, units)
+        erd_format.icon_rule(state) if erd_format.icon_rule else erd_format.icon
+        erd_format.device_class
+
+
+def main(number: int = 20000, repeat: int = 5):
+    renders = number * len(SAMPLES)
+    for label, func in (("functions", render_with_functions), ("formats", render_with_formats)):
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        print(f"{label:>10}: {best / renders * 1e9:8.1f} ns/render")
+
+
+if __name__ == "__main__":
+    main()
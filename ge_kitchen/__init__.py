@@ -1,7 +1,6 @@
 """The ge_kitchen integration."""
 
 import asyncio
-import async_timeout
 import logging
 import voluptuous as vol
 
@@ -19,6 +18,7 @@
     OAUTH2_TOKEN_URL,
 )
 from .exceptions import AuthError, CannotConnect
+from .snapshot import ApplianceSnapshot
 from .update_coordinator import GeKitchenUpdateCoordinator
 
 CONFIG_SCHEMA = vol.Schema({DOMAIN: vol.Schema({})}, extra=vol.ALLOW_EXTRA)
@@ -41,19 +41,19 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     try:
         await coordinator.async_start_client()
-    except GeAuthError:
-        raise AuthError('Authentication failure')
-    except GeServerError:
-        raise CannotConnect('Cannot connect (server error)')
-    except Exception:
+    except Exception as exc:
+        # Don't leave anything the coordinator started running
+        hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_shutdown()
+        if isinstance(exc, GeAuthError):
+            raise AuthError('Authentication failure')
+        if isinstance(exc, GeServerError):
+            raise CannotConnect('Cannot connect (server error)')
         raise CannotConnect('Unknown connection failure')
 
-    try:
-        with async_timeout.timeout(30):
-            await coordinator.initialization_future
-    except TimeoutError:
-        raise CannotConnect('Initialization timed out')
+    coordinator.remove_update_listener = entry.add_update_listener(async_update_options)
 
+    # Entities are added by each platform as their appliances come up, so don't wait on them here
     for component in PLATFORMS:
         hass.async_create_task(
             hass.config_entries.async_forward_entry_setup(entry, component)
@@ -73,11 +73,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)  # type: GeKitchenUpdateCoordinator
+        await coordinator.async_shutdown()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Delete the warm start snapshot along with the entry."""
+    snapshot = ApplianceSnapshot(hass, entry.entry_id)
+    await snapshot.async_load()
+    await snapshot.async_remove()
+
+
 async def async_update_options(hass, config_entry):
-    """Update options."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """Push updated options into the running coordinator."""
+    coordinator = hass.data[DOMAIN].get(config_entry.entry_id)  # type: GeKitchenUpdateCoordinator
+    if coordinator is not None:
+        coordinator.apply_options(config_entry.options)
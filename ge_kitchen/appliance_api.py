@@ -2,9 +2,9 @@
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Type, TYPE_CHECKING
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple, Type, TYPE_CHECKING
 
-from gekitchen import GeAppliance
+from gekitchen import ErdCodeType, GeAppliance, translate_erd_code
 from gekitchen.erd_constants import *
 from gekitchen.erd_types import *
 
@@ -12,33 +12,21 @@
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .binary_sensor import GeErdBinarySensor
-from .const import DOMAIN
-from .entities import GeErdEntity
-from .sensor import GeErdSensor
-from .switch import GeErdSwitch
-from .water_heater import (
-    GeFreezerEntity,
-    GeFridgeEntity,
-    GeOvenHeaterEntity,
-    LOWER_OVEN,
-    UPPER_OVEN,
+from .circuit_breaker import CircuitBreaker
+from .const import (
+    DOMAIN,
+    ERD_WRITE_ACK_TIMEOUT,
+    EVENT_ERD_WRITE_FAILED,
 )
-
-
-
+from .entity_descriptors import EntityDescriptor, get_entity_descriptors
+from .outbound_queue import PRIORITY_REFRESH, PRIORITY_USER
+from .erd_constants.oven_constants import OVEN_DISPLAY_STATE_MAP, STATE_OVEN_OFF, STATE_OVEN_PREHEAT
 
 _LOGGER = logging.getLogger(__name__)
 
-
 def get_appliance_api_type(appliance_type: ErdApplianceType) -> Type:
     """Get the appropriate appliance type"""
-    if appliance_type == ErdApplianceType.OVEN:
-        return OvenApi
-    if appliance_type == ErdApplianceType.FRIDGE:
-        return FridgeApi
-    # Fallback
-    return ApplianceApi
+    return APPLIANCE_API_TYPES.get(appliance_type, ApplianceApi)
 
 
 class ApplianceApi:
@@ -57,7 +45,16 @@ def __init__(self, coordinator: DataUpdateCoordinator, appliance: GeAppliance):
         self._hass = coordinator.hass
         self.coordinator = coordinator
         self.initial_update = False
+        self.stale = False  # True while showing state restored from the last run
         self._entities = {}  # type: Optional[Dict[str, Entity]]
+        self._serial_number = None  # type: Optional[str]
+        self._model_number = None  # type: Optional[str]
+        self._device_info = None  # type: Optional[Dict]
+        self._erd_index = {}  # type: Dict[ErdCodeType, List[Entity]]
+        self._pending_entities = {}  # type: Dict[ErdCodeType, List[EntityDescriptor]]
+        self._pending_acks = {}  # type: Dict[ErdCodeType, List[Tuple[str, asyncio.Future]]]
+        self._overlay = {}  # type: Dict[ErdCodeType, Tuple[Any, object]]
+        self.circuit_breaker = CircuitBreaker(self._hass, appliance.mac_addr)
 
     @property
     def hass(self) -> HomeAssistant:
@@ -75,11 +72,15 @@ def appliance(self) -> GeAppliance:
 
     @property
     def serial_number(self) -> str:
-        return self.appliance.get_erd_value(ErdCode.SERIAL_NUMBER)
+        if self._serial_number is None:
+            self._serial_number = self.appliance.get_erd_value(ErdCode.SERIAL_NUMBER)
+        return self._serial_number
 
     @property
     def model_number(self) -> str:
-        return self.appliance.get_erd_value(ErdCode.MODEL_NUMBER)
+        if self._model_number is None:
+            self._model_number = self.appliance.get_erd_value(ErdCode.MODEL_NUMBER)
+        return self._model_number
 
     @property
     def name(self) -> str:
@@ -92,86 +93,337 @@ def name(self) -> str:
 
     @property
     def device_info(self) -> Dict:
-        """Device info dictionary."""
-        return {
-            "identifiers": {(DOMAIN, self.serial_number)},
-            "name": self.name,
-            "manufacturer": "GE",
-            "model": self.model_number,
-            "sw_version": self.appliance.get_erd_value(ErdCode.WIFI_MODULE_SW_VERSION),
-        }
+        """Device info dictionary, built once and shared by all of this appliance's entities."""
+        if self._device_info is None:
+            self._device_info = {
+                "identifiers": {(DOMAIN, self.serial_number)},
+                "name": self.name,
+                "manufacturer": "GE",
+                "model": self.model_number,
+                "sw_version": self.appliance.get_erd_value(ErdCode.WIFI_MODULE_SW_VERSION),
+            }
+        return self._device_info
 
     @property
     def entities(self) -> List[Entity]:
         return list(self._entities.values())
 
-    def get_all_entities(self) -> List[Entity]:
-        """Create Entities for this device."""
-        entities = [
-            GeErdSensor(self, ErdCode.CLOCK_TIME),
-            GeErdSwitch(self, ErdCode.SABBATH_MODE),
-        ]
-        return entities
+    @property
+    def poll_interval(self) -> float:
+        """How often to poll this appliance for a full update, in seconds."""
+        return self.coordinator.poll_interval
+
+    async def async_request_refresh(self):
+        """
+        Request a full update of the appliance's state.
+
+        The API can only read ERDs one at a time, so asking for just the ones our entities use
+        would take a message per ERD, whereas a full update is a single request.
+        """
+        await self.coordinator.outbound_queue.async_send(
+            self.appliance.async_request_update, PRIORITY_REFRESH, self.appliance.mac_addr
+        )
+
+    def get_erd_value(self, erd_code: ErdCodeType) -> Any:
+        """Get an ERD's value as entities should show it, i.e. including writes that are still in flight."""
+        if self._overlay:
+            try:
+                return self._overlay[translate_erd_code(erd_code)][0]
+            except KeyError:
+                pass
+        return self.appliance.get_erd_value(erd_code)
+
+    def overlay_erd_value(self, erd_code: ErdCodeType, value: Any, owner: object):
+        """
+        Optimistically show a value we're writing, until its owner clears it.
+
+        :param erd_code: The ERD code being written
+        :param value: The value being written
+        :param owner: Whatever is responsible for the write, which takes over from any previous owner
+        """
+        erd_code = translate_erd_code(erd_code)
+        self._overlay[erd_code] = (value, owner)
+        self._schedule_entities(erd_code)
+
+    def clear_overlay(self, erd_code: ErdCodeType, owner: object) -> bool:
+        """
+        Go back to showing an ERD's actual value, unless someone else has written to it since.
+
+        :return: True if the overlay was cleared
+        """
+        erd_code = translate_erd_code(erd_code)
+        overlaid = self._overlay.get(erd_code)
+        if overlaid is None or overlaid[1] is not owner:
+            return False
+        del self._overlay[erd_code]
+        self._schedule_entities(erd_code)
+        return True
+
+    def _schedule_entities(self, erd_code: ErdCodeType):
+        for entity in self.get_entities_for_erd_codes((erd_code,)):
+            self.coordinator.write_scheduler.schedule(entity)
+
+    async def async_set_erd_values(
+            self,
+            values: Mapping[ErdCodeType, Any],
+            timeout: float = ERD_WRITE_ACK_TIMEOUT) -> Dict[ErdCodeType, Optional[Exception]]:
+        """
+        Write several ERD values in one batch.
+
+        Every write is sent before waiting on any of them, so the batch costs a single round trip
+        however many ERDs it changes.  The batch goes through the outbound queue as a user request,
+        so it goes ahead of any polls waiting to be sent.  gekitchen doesn't hand setErd responses back to us, but it
+        does apply a successful write to the appliance and report it as an update, so a write
+        counts as acknowledged when we see an update carrying the value we sent.  Rejected writes
+        are only logged by the client, so they show up here as timeouts.
+
+        Entities show the new values as soon as they're sent.  Any that aren't acknowledged in
+        time are rolled back, and `EVENT_ERD_WRITE_FAILED` is fired for each of them.
+
+        Writes to an appliance that's unavailable, or that has been failing, are rejected up front
+        by its circuit breaker.
+
+        :param values: New values, by ERD code
+        :param timeout: Seconds to wait for the acknowledgements
+        :return: None for each ERD that was acknowledged, or the exception for each one that wasn't
+        :raises ApplianceUnavailable: if the circuit breaker rejected the batch
+        """
+        self.circuit_breaker.check(self.appliance.available)
+        results = {}  # type: Dict[ErdCodeType, Optional[Exception]]
+        failed = False
+        acks = {}  # type: Dict[ErdCodeType, asyncio.Future]
+        erd_values = {}  # type: Dict[ErdCodeType, str]
+        values = {translate_erd_code(erd_code): value for erd_code, value in values.items()}
+        verdict = False
+        try:
+            for erd_code, value in values.items():
+                try:
+                    erd_value = self.appliance.encode_erd_value(erd_code, value)
+                except Exception as err:  # pylint: disable=broad-except
+                    results[erd_code] = err
+                    continue
+                acks[erd_code] = ack = self._expect_ack(erd_code, erd_value)
+                self.overlay_erd_value(erd_code, value, ack)
+                erd_values[erd_code] = erd_value
+            if erd_values:
+                send_errors = await self.coordinator.outbound_queue.async_send(
+                    lambda: self._async_send_erd_values(erd_values),
+                    PRIORITY_USER,
+                    self.appliance.mac_addr,
+                    len(erd_values),
+                )
+                for erd_code, err in send_errors.items():
+                    failed = True
+                    ack = acks.pop(erd_code)
+                    self._forget_ack(erd_code, ack)
+                    self._roll_back(erd_code, values[erd_code], ack, err)
+                    results[erd_code] = err
+            if acks:
+                await asyncio.wait(list(acks.values()), timeout=timeout)
+            for erd_code, ack in acks.items():
+                if not ack.done():
+                    failed = True
+                    err = asyncio.TimeoutError(f"No acknowledgement for {erd_code}")
+                    self._roll_back(erd_code, values[erd_code], ack, err)
+                    results[erd_code] = err
+                elif ack.cancelled():
+                    results[erd_code] = asyncio.CancelledError()
+                else:
+                    results[erd_code] = None
+            if failed:
+                self.circuit_breaker.record_failure()
+                verdict = True
+            elif any(result is None for result in results.values()):
+                self.circuit_breaker.record_success()
+                verdict = True
+        finally:
+            if not verdict:
+                self.circuit_breaker.record_abandoned()
+            for erd_code, ack in acks.items():
+                ack.cancel()
+                self._forget_ack(erd_code, ack)
+                self.clear_overlay(erd_code, ack)
+        return results
+
+    async def _async_send_erd_values(self, erd_values: Dict[ErdCodeType, str]) -> Dict[ErdCodeType, Exception]:
+        """
+        Send encoded ERD values back to back, without waiting on any responses.
+
+        :return: The exception for each ERD that couldn't be sent
+        """
+        errors = {}
+        for erd_code, erd_value in erd_values.items():
+            try:
+                await self.appliance.client.async_set_erd_value(self.appliance, erd_code, erd_value)
+            except Exception as err:  # pylint: disable=broad-except
+                _LOGGER.debug(f'Failed to send {erd_code} to {self.appliance.mac_addr}: {err}')
+                errors[erd_code] = err
+        return errors
+
+    def _roll_back(self, erd_code: ErdCodeType, value: Any, owner: object, err: Exception):
+        """Stop showing a write that failed, and let everyone know."""
+        if not self.clear_overlay(erd_code, owner):
+            # Superseded by a later write, which will report for itself
+            return
+        _LOGGER.warning(f'Failed to set {erd_code} to {value} on {self.appliance.mac_addr}: {err!r}')
+        self.hass.bus.async_fire(EVENT_ERD_WRITE_FAILED, {
+            "mac_addr": self.appliance.mac_addr,
+            "serial_number": self.serial_number,
+            "erd_code": getattr(erd_code, "name", erd_code),
+            "value": str(value),
+            "error": str(err),
+        })
+
+    def _expect_ack(self, erd_code: ErdCodeType, erd_value: str) -> asyncio.Future:
+        ack = self._hass.loop.create_future()
+        self._pending_acks.setdefault(erd_code, []).append((erd_value.lower(), ack))
+        return ack
+
+    def _forget_ack(self, erd_code: ErdCodeType, ack: asyncio.Future):
+        pending = self._pending_acks.get(erd_code)
+        if not pending:
+            return
+        pending[:] = [(value, future) for value, future in pending if future is not ack]
+        if not pending:
+            del self._pending_acks[erd_code]
+
+    def acknowledge_writes(self, updates: Mapping[ErdCodeType, str]):
+        """Resolve any writes that raw ERD updates from the appliance confirm."""
+        if not self._pending_acks:
+            return
+        for erd_code, erd_value in updates.items():
+            pending = self._pending_acks.get(translate_erd_code(erd_code))
+            if not pending:
+                continue
+            erd_value = erd_value.lower()
+            for value, ack in pending:
+                if value == erd_value and not ack.done():
+                    ack.set_result(None)
+
+    def cancel_writes(self):
+        """Stop waiting on any acknowledgements, and stop showing anything that hasn't been confirmed."""
+        for pending in self._pending_acks.values():
+            for _, ack in pending:
+                ack.cancel()
+        self._pending_acks.clear()
+        self._overlay.clear()
 
-    def build_entities_list(self) -> None:
-        """Build the entities list, adding anything new."""
-        entities = [
-            e for e in self.get_all_entities()
-            if not isinstance(e, GeErdEntity) or e.erd_code in self.appliance.known_properties
-        ]
+    @property
+    def entity_descriptors(self) -> Tuple[EntityDescriptor, ...]:
+        """Descriptors of every entity this type of appliance can have."""
+        return get_entity_descriptors(self.appliance.appliance_type)
 
-        for entity in entities:
-            if entity.unique_id not in self._entities:
-                self._entities[entity.unique_id] = entity
+    def build_entities_list(self) -> None:
+        """
+        Build the entities list, adding anything new.
+
+        Entities are only created once the appliance has sent every ERD code they require.  Until
+        then their descriptors are held back, indexed by a missing ERD code, until
+        `discover_entities` sees it.
+        """
+        known_properties = self.appliance.known_properties
+        self._pending_entities = {}
+        for descriptor in self.entity_descriptors:
+            self._maybe_add_entity(descriptor, known_properties)
+        self._build_erd_index()
+
+    def _maybe_add_entity(self, descriptor: EntityDescriptor, known_properties: Set[ErdCodeType]) -> Optional[Entity]:
+        """
+        Create and add a descriptor's entity if its requirements are met.
+
+        :return: The new entity, or None if it wasn't added
+        """
+        for erd_code in descriptor.required_erds:
+            if erd_code not in known_properties:
+                self._pending_entities.setdefault(erd_code, []).append(descriptor)
+                return None
+        if descriptor.predicate is not None and not descriptor.predicate(self):
+            return None
+        entity = descriptor.factory(self)
+        if entity.unique_id in self._entities:
+            return None
+        self._entities[entity.unique_id] = entity
+        return entity
+
+    def discover_entities(self, erd_codes: Iterable[ErdCodeType]) -> List[Entity]:
+        """
+        Add any entities that were waiting on the given ERD codes.
+
+        :return: The newly added entities
+        """
+        if not self._pending_entities:
+            return []
+        known_properties = None
+        new_entities = []
+        for erd_code in erd_codes:
+            descriptors = self._pending_entities.pop(translate_erd_code(erd_code), None)
+            if not descriptors:
+                continue
+            if known_properties is None:
+                known_properties = self.appliance.known_properties
+            for descriptor in descriptors:
+                entity = self._maybe_add_entity(descriptor, known_properties)
+                if entity is not None:
+                    new_entities.append(entity)
+        if new_entities:
+            self._build_erd_index()
+        return new_entities
+
+    def _build_erd_index(self) -> None:
+        """Map each ERD code to the entities that need to be refreshed when it changes."""
+        erd_index = {}  # type: Dict[ErdCodeType, List[Entity]]
+        for entity in self._entities.values():
+            for erd_code in entity.erd_codes:
+                erd_index.setdefault(translate_erd_code(erd_code), []).append(entity)
+        self._erd_index = erd_index
+
+    def get_entities_for_erd_codes(self, erd_codes: Iterable[ErdCodeType]) -> List[Entity]:
+        """Get the entities that depend on any of the given ERD codes, without duplicates."""
+        entities = {}
+        for erd_code in erd_codes:
+            for entity in self._erd_index.get(translate_erd_code(erd_code), ()):
+                entities[id(entity)] = entity
+        return list(entities.values())
 
 
 class OvenApi(ApplianceApi):
     """API class for oven objects"""
     APPLIANCE_TYPE = ErdApplianceType.OVEN
 
-    def get_all_entities(self) -> List[Entity]:
-        base_entities = super().get_all_entities()
-        oven_config: OvenConfiguration = self.appliance.get_erd_value(ErdCode.OVEN_CONFIGURATION)
-        _LOGGER.debug(f"Oven Config: {oven_config}")
-        oven_entities = [
-            GeErdSensor(self, ErdCode.UPPER_OVEN_COOK_MODE),
-            GeErdSensor(self, ErdCode.UPPER_OVEN_COOK_TIME_REMAINING),
-            GeErdSensor(self, ErdCode.UPPER_OVEN_KITCHEN_TIMER),
-            GeErdSensor(self, ErdCode.UPPER_OVEN_USER_TEMP_OFFSET),
-            GeErdBinarySensor(self, ErdCode.UPPER_OVEN_REMOTE_ENABLED),
-        ]
-
-        if oven_config.has_lower_oven:
-            oven_entities.extend([
-                GeErdSensor(self, ErdCode.LOWER_OVEN_COOK_MODE),
-                GeErdSensor(self, ErdCode.LOWER_OVEN_COOK_TIME_REMAINING),
-                GeErdSensor(self, ErdCode.LOWER_OVEN_USER_TEMP_OFFSET),
-                GeErdBinarySensor(self, ErdCode.LOWER_OVEN_REMOTE_ENABLED),
-                GeOvenHeaterEntity(self, LOWER_OVEN, True),
-                GeOvenHeaterEntity(self, UPPER_OVEN, True),
-            ])
-        else:
-            oven_entities.append(GeOvenHeaterEntity(self, UPPER_OVEN, False))
-        return base_entities + oven_entities
+    @property
+    def poll_interval(self) -> float:
+        """Poll quickly while preheating and slowly while off."""
+        display_states = set()
+        for erd_code in (ErdCode.UPPER_OVEN_CURRENT_STATE, ErdCode.LOWER_OVEN_CURRENT_STATE):
+            try:
+                oven_state = self.appliance.get_erd_value(erd_code)
+            except KeyError:
+                continue
+            display_states.add(OVEN_DISPLAY_STATE_MAP.get(oven_state, STATE_OVEN_OFF))
+        if STATE_OVEN_PREHEAT in display_states:
+            return self.coordinator.poll_interval_active
+        if display_states <= {STATE_OVEN_OFF}:
+            return self.coordinator.poll_interval_idle
+        return self.coordinator.poll_interval
 
 
 class FridgeApi(ApplianceApi):
     """API class for oven objects"""
     APPLIANCE_TYPE = ErdApplianceType.FRIDGE
 
-    def get_all_entities(self) -> List[Entity]:
-        base_entities = super().get_all_entities()
-
-        fridge_entities = [
-            # GeErdSensor(self, ErdCode.AIR_FILTER_STATUS),
-            GeErdSensor(self, ErdCode.DOOR_STATUS),
-            GeErdSensor(self, ErdCode.FRIDGE_MODEL_INFO),
-            # GeErdSensor(self, ErdCode.HOT_WATER_LOCAL_USE),
-            # GeErdSensor(self, ErdCode.HOT_WATER_SET_TEMP),
-            # GeErdSensor(self, ErdCode.HOT_WATER_STATUS),
-            GeErdSwitch(self, ErdCode.SABBATH_MODE),
-            GeFreezerEntity(self),
-            GeFridgeEntity(self),
-        ]
-        entities = base_entities + fridge_entities
-        return entities
+    @property
+    def poll_interval(self) -> float:
+        """Poll quickly while a door is open and slowly otherwise."""
+        try:
+            door_status: FridgeDoorStatus = self.appliance.get_erd_value(ErdCode.DOOR_STATUS)
+        except KeyError:
+            return self.coordinator.poll_interval
+        if door_status and ErdDoorStatus.OPEN in door_status[:4]:
+            return self.coordinator.poll_interval_active
+        return self.coordinator.poll_interval_idle
+
+
+APPLIANCE_API_TYPES = {
+    ErdApplianceType.OVEN: OvenApi,
+    ErdApplianceType.FRIDGE: FridgeApi,
+}  # type: Dict[ErdApplianceType, Type[ApplianceApi]]
@@ -0,0 +1,110 @@
+"""Per-appliance circuit breaker for ERD writes."""
+
+import logging
+from typing import Optional
+
+from homeassistant.core import HomeAssistant
+
+from .const import CIRCUIT_BREAKER_COOLDOWN, CIRCUIT_BREAKER_THRESHOLD
+from .exceptions import ApplianceUnavailable
+
+_LOGGER = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stop sending writes to an appliance that can't take them, so callers fail fast instead of timing out.
+
+    The breaker opens after `threshold` writes in a row fail, or as soon as the appliance is
+    unavailable, and rejects writes while it's open.  After `cooldown` seconds (or as soon as an
+    unavailable appliance comes back), it half-opens and lets a single write through to probe
+    the appliance, rejecting any others until the probe is done.  If the probe succeeds, the
+    breaker closes, and if it fails, it opens for another cooldown.
+
+    Whoever sends a write that gets past `check` has to report how it went, through
+    `record_success`, `record_failure` or `record_abandoned`, so the breaker knows when the probe
+    is done.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            mac_addr: str,
+            threshold: int = CIRCUIT_BREAKER_THRESHOLD,
+            cooldown: float = CIRCUIT_BREAKER_COOLDOWN):
+        """
+        :param hass: HomeAssistant instance
+        :param mac_addr: The appliance's MAC address, which names it in errors and logs
+        :param threshold: Consecutive failures that open the breaker
+        :param cooldown: Seconds to stay open before probing the appliance again
+        """
+        self._hass = hass
+        self.mac_addr = mac_addr
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = None  # type: Optional[float]
+        self._unavailable = False
+        self._probing = False
+
+    def check(self, available: bool, probe: bool = True):
+        """
+        Make sure a write can be sent.
+
+        :param available: Whether the appliance is currently available
+        :param probe: Whether the write is about to be sent, and so can be the probe.  Pass False
+            to check ahead of time (e.g. before a debounce window) without claiming the probe.
+        :raises ApplianceUnavailable: if the write should be rejected
+        """
+        if not available:
+            if self.state != STATE_OPEN or not self._unavailable:
+                _LOGGER.info(f'Appliance {self.mac_addr} is unavailable, rejecting writes')
+            self._open()
+            self._unavailable = True
+            self.rejected += 1
+            raise ApplianceUnavailable(f"Appliance {self.mac_addr} is unavailable")
+        if self.state == STATE_OPEN:
+            if self._unavailable or self._hass.loop.time() >= self._opened_at + self.cooldown:
+                if probe:
+                    _LOGGER.debug(f'Probing appliance {self.mac_addr} again')
+                    self.state = STATE_HALF_OPEN
+                    self._unavailable = False
+                    self._probing = True
+            else:
+                self.rejected += 1
+                raise ApplianceUnavailable(f"Not sending to appliance {self.mac_addr} after {self.failures:d} failed writes")
+        elif self.state == STATE_HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise ApplianceUnavailable(f"Not sending to appliance {self.mac_addr} until it has been probed")
+            self._probing = probe
+
+    def record_success(self):
+        if self.state != STATE_CLOSED:
+            _LOGGER.info(f'Writes to appliance {self.mac_addr} are succeeding again')
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.threshold:
+            if self.state != STATE_OPEN:
+                _LOGGER.warning(f'{self.failures:d} writes to appliance {self.mac_addr} failed, rejecting writes for {self.cooldown}s')
+            self._open()
+
+    def record_abandoned(self):
+        """A write finished without telling us anything (e.g. it was cancelled), so let another write probe."""
+        self._probing = False
+
+    def _open(self):
+        self.state = STATE_OPEN
+        self._opened_at = self._hass.loop.time()
@@ -11,9 +11,25 @@
 
 from homeassistant import config_entries, core
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-
-from .const import DOMAIN  # pylint:disable=unused-import
+from homeassistant.core import callback
+
+from .const import (  # pylint:disable=unused-import
+    APPLIANCE_READY_TIMEOUT,
+    CONF_APPLIANCE_READY_TIMEOUT,
+    CONF_ERD_THROTTLES,
+    CONF_POLL_INTERVAL,
+    CONF_POLL_INTERVAL_ACTIVE,
+    CONF_POLL_INTERVAL_IDLE,
+    CONF_STATE_WRITE_DEBOUNCE,
+    DOMAIN,
+    STATE_WRITE_DEBOUNCE,
+    UPDATE_INTERVAL,
+    UPDATE_INTERVAL_ACTIVE,
+    UPDATE_INTERVAL_IDLE,
+)
+from .credentials import with_cached_oauth2_token
 from .exceptions import AuthError, CannotConnect
+from .throttle import parse_erd_throttles
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,7 +46,7 @@ async def validate_input(hass: core.HomeAssistant, data):
     # noinspection PyBroadException
     try:
         with async_timeout.timeout(10):
-            _ = await async_get_oauth2_token(session, data[CONF_USERNAME], data[CONF_PASSWORD])
+            auth_header = await async_get_oauth2_token(session, data[CONF_USERNAME], data[CONF_PASSWORD])
     except (asyncio.TimeoutError, aiohttp.ClientError):
         raise CannotConnect('Connection failure')
     except GeAuthError:
@@ -42,7 +58,7 @@ async def validate_input(hass: core.HomeAssistant, data):
         raise CannotConnect('Unknown connection failure')
 
     # Return info that you want to store in the config entry.
-    return {"title": f"GE Kitchen ({data[CONF_USERNAME]:s})"}
+    return {"title": f"GE Kitchen ({data[CONF_USERNAME]:s})", "auth_header": auth_header}
 
 
 class GeKitchenConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -51,6 +67,12 @@ class GeKitchenConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_PUSH
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return GeKitchenOptionsFlow(config_entry)
+
     async def _async_validate_input(self, user_input):
         """Validate form input."""
         errors = {}
@@ -75,7 +97,9 @@ async def async_step_user(self, user_input: Optional[Dict] = None):
         if user_input is not None:
             info, errors = await self._async_validate_input(user_input)
             if info:
-                return self.async_create_entry(title=info["title"], data=user_input)
+                return self.async_create_entry(
+                    title=info["title"], data=with_cached_oauth2_token(user_input, info["auth_header"])
+                )
 
         return self.async_show_form(
             step_id="user", data_schema=GEKITCHEN_SCHEMA, errors=errors
@@ -86,13 +110,13 @@ async def async_step_reauth(self, user_input: Optional[dict] = None):
         errors = {}
 
         if user_input is not None:
-            _, errors = await self._async_validate_input(user_input)
+            info, errors = await self._async_validate_input(user_input)
 
             if not errors:
                 for entry in self._async_current_entries():
                     if entry.unique_id == self.unique_id:
                         self.hass.config_entries.async_update_entry(
-                            entry, data=user_input
+                            entry, data=with_cached_oauth2_token(user_input, info["auth_header"])
                         )
                         await self.hass.config_entries.async_reload(entry.entry_id)
                         return self.async_abort(reason="reauth_successful")
@@ -103,3 +127,46 @@ async def async_step_reauth(self, user_input: Optional[dict] = None):
         return self.async_show_form(
             step_id="reauth", data_schema=GEKITCHEN_SCHEMA, errors=errors,
         )
+
+
+class GeKitchenOptionsFlow(config_entries.OptionsFlow):
+    """Handle GE Kitchen options.  These are applied to the running integration, without reconnecting."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input: Optional[Dict] = None):
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            try:
+                parse_erd_throttles(user_input.get(CONF_ERD_THROTTLES, ""))
+            except ValueError:
+                errors[CONF_ERD_THROTTLES] = "invalid_erd_throttles"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        seconds = vol.All(vol.Coerce(float), vol.Range(min=1))
+        data_schema = vol.Schema(
+            {
+                vol.Optional(
+                    CONF_POLL_INTERVAL, default=options.get(CONF_POLL_INTERVAL, UPDATE_INTERVAL)
+                ): seconds,
+                vol.Optional(
+                    CONF_POLL_INTERVAL_ACTIVE, default=options.get(CONF_POLL_INTERVAL_ACTIVE, UPDATE_INTERVAL_ACTIVE)
+                ): seconds,
+                vol.Optional(
+                    CONF_POLL_INTERVAL_IDLE, default=options.get(CONF_POLL_INTERVAL_IDLE, UPDATE_INTERVAL_IDLE)
+                ): seconds,
+                vol.Optional(
+                    CONF_STATE_WRITE_DEBOUNCE, default=options.get(CONF_STATE_WRITE_DEBOUNCE, STATE_WRITE_DEBOUNCE)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                vol.Optional(
+                    CONF_APPLIANCE_READY_TIMEOUT,
+                    default=options.get(CONF_APPLIANCE_READY_TIMEOUT, APPLIANCE_READY_TIMEOUT),
+                ): seconds,
+                vol.Optional(CONF_ERD_THROTTLES, default=options.get(CONF_ERD_THROTTLES, "")): str,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=data_schema, errors=errors)
@@ -10,9 +10,49 @@
 
 AUTH_HANDLER = "auth_handler"
 EVENT_ALL_APPLIANCES_READY = 'all_appliances_ready'
+EVENT_ERD_WRITE_FAILED = f'{DOMAIN}_erd_write_failed'
 COORDINATOR = "coordinator"
 GE_TOKEN = "ge_token"
 MOBILE_DEVICE_TOKEN = "mdt"
 XMPP_CREDENTIALS = "xmpp_credentials"
 
 UPDATE_INTERVAL = 30
+ROSTER_REFRESH_INTERVAL = 3600  # How often to re-request the appliance list, to pick up added or removed appliances
+APPLIANCE_REMOVAL_ROSTERS = 3  # Consecutive rosters an appliance has to be missing from before we remove it
+APPLIANCE_REMOVAL_GRACE_PERIOD = 7200  # Seconds an appliance has to be missing for before we remove it
+UPDATE_INTERVAL_ACTIVE = 10  # Poll interval while an appliance is busy (e.g. preheating, door open)
+UPDATE_INTERVAL_IDLE = 120  # Poll interval while an appliance is idle
+POLL_JITTER = 0.1  # Fraction by which poll times are randomly perturbed
+ERD_WRITE_ACK_TIMEOUT = 10  # Seconds to wait for an appliance to acknowledge an ERD write
+ERD_WRITE_DEBOUNCE = 0.5  # Seconds an ERD has to go without writes before the latest value is sent
+CIRCUIT_BREAKER_THRESHOLD = 3  # Consecutive failed writes before we stop sending writes to an appliance
+CIRCUIT_BREAKER_COOLDOWN = 30  # Seconds to reject writes for before letting them through again to probe
+OUTBOUND_APPLIANCE_RATE = 2  # Messages a second we'll send for any one appliance
+OUTBOUND_APPLIANCE_BURST = 10
+OUTBOUND_ACCOUNT_RATE = 5  # Messages a second we'll send for the whole account
+OUTBOUND_ACCOUNT_BURST = 20
+STATE_WRITE_DEBOUNCE = 0.15  # Seconds to coalesce entity state writes over
+DIAGNOSTICS_UPDATE_INTERVAL = 300  # Seconds between writes of the diagnostics sensor's state
+APPLIANCE_READY_TIMEOUT = 20  # Seconds to wait for an appliance's initial update before starting without it
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60  # Seconds to wait before writing changed appliances to the warm start snapshot
+
+CONF_CREDENTIALS = "credentials"
+# The API doesn't report these, so we assume conservative lifetimes
+OAUTH2_TOKEN_LIFETIME = 3600
+WSS_CREDENTIALS_LIFETIME = 3600
+CREDENTIAL_REFRESH_MARGIN = 300  # Seconds before expiry to refresh cached credentials
+CREDENTIAL_REFRESH_RETRY = 60  # Seconds to wait before retrying a failed background refresh
+
+RECONNECT_MIN_DELAY = 1  # Seconds to wait before the first reconnection attempt, doubled on each failure
+RECONNECT_MAX_DELAY = 300  # Longest we'll ever wait between reconnection attempts
+RECONNECT_GRACE_PERIOD = 60  # Seconds we can be disconnected before appliances are shown as unavailable
+INBOUND_QUEUE_SIZE = 16  # Updates to queue per appliance before merging new ones into the last
+
+# Options
+CONF_POLL_INTERVAL = "poll_interval"
+CONF_POLL_INTERVAL_ACTIVE = "poll_interval_active"
+CONF_POLL_INTERVAL_IDLE = "poll_interval_idle"
+CONF_STATE_WRITE_DEBOUNCE = "state_write_debounce"
+CONF_APPLIANCE_READY_TIMEOUT = "appliance_ready_timeout"
+CONF_ERD_THROTTLES = "erd_throttles"  # Comma-separated ERD=SECONDS pairs
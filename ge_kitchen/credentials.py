@@ -0,0 +1,154 @@
+"""Cache of the OAuth2 token and websocket credentials, kept in the config entry."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from aiohttp import ClientSession
+from gekitchen import GeAuthError, async_get_oauth2_token
+from gekitchen.async_login_flow import async_get_wss_credentials
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_CREDENTIALS,
+    CREDENTIAL_REFRESH_MARGIN,
+    CREDENTIAL_REFRESH_RETRY,
+    OAUTH2_TOKEN_LIFETIME,
+    WSS_CREDENTIALS_LIFETIME,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+OAUTH2_TOKEN = "oauth2_token"
+WSS_CREDENTIALS = "wss_credentials"
+
+
+def with_cached_oauth2_token(data: Dict[str, Any], auth_header: Dict[str, str]) -> Dict[str, Any]:
+    """Add an OAuth2 token that was just issued to config entry data, so setup doesn't have to log in again."""
+    credentials = {OAUTH2_TOKEN: {"value": auth_header, "expires_at": time.time() + OAUTH2_TOKEN_LIFETIME}}
+    return {**data, CONF_CREDENTIALS: credentials}
+
+
+class CredentialCache:
+    """
+    Keep the OAuth2 token and the websocket credentials derived from it, along with when they expire.
+
+    They are stored in the config entry so that they survive restarts.  The API doesn't tell us
+    how long either one lasts, so we assume fixed lifetimes, refresh the websocket credentials in
+    the background shortly before they expire, and fall back to a full login whenever something
+    cached is rejected.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            config_entry: ConfigEntry,
+            margin: float = CREDENTIAL_REFRESH_MARGIN,
+            create_task: Optional[Callable[[Coroutine], Any]] = None):
+        self._hass = hass
+        self._create_task = create_task or hass.async_create_task
+        self._config_entry = config_entry
+        self.margin = margin
+        self._refresh_handle = None  # type: Optional[asyncio.TimerHandle]
+        self.logins = 0
+        self.cache_hits = 0
+        self.refreshes = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "credential_logins": self.logins,
+            "credential_cache_hits": self.cache_hits,
+            "credential_refreshes": self.refreshes,
+        }
+
+    def _get_cached(self, kind: str) -> Optional[Dict]:
+        """Get a cached value, if it's not about to expire."""
+        try:
+            cached = self._config_entry.data[CONF_CREDENTIALS][kind]
+        except KeyError:
+            return None
+        if cached["expires_at"] - self.margin <= time.time():
+            return None
+        return cached["value"]
+
+    def _set_cached(self, kind: str, value: Optional[Dict], lifetime: float = 0):
+        credentials = dict(self._config_entry.data.get(CONF_CREDENTIALS, {}))
+        if value is None:
+            credentials.pop(kind, None)
+        else:
+            credentials[kind] = {"value": value, "expires_at": time.time() + lifetime}
+        self._hass.config_entries.async_update_entry(
+            self._config_entry, data={**self._config_entry.data, CONF_CREDENTIALS: credentials}
+        )
+
+    def invalidate(self):
+        """Forget the cached websocket credentials, e.g. because they were rejected."""
+        self._set_cached(WSS_CREDENTIALS, None)
+
+    async def async_get_wss_credentials(self, session: ClientSession) -> Dict:
+        """Get websocket credentials, only going through the login flow if there's nothing valid cached."""
+        wss_credentials = self._get_cached(WSS_CREDENTIALS)
+        if wss_credentials is not None:
+            _LOGGER.debug('Using cached websocket credentials')
+            self.cache_hits += 1
+        else:
+            wss_credentials = await self._async_fetch_wss_credentials(session)
+        self._schedule_refresh()
+        return wss_credentials
+
+    async def _async_fetch_wss_credentials(self, session: ClientSession) -> Dict:
+        auth_header = self._get_cached(OAUTH2_TOKEN)
+        if auth_header is not None:
+            try:
+                wss_credentials = await async_get_wss_credentials(session, auth_header)
+            except GeAuthError:
+                _LOGGER.debug('Cached OAuth2 token rejected, logging in again')
+            else:
+                self._set_cached(WSS_CREDENTIALS, wss_credentials, WSS_CREDENTIALS_LIFETIME)
+                return wss_credentials
+
+        data = self._config_entry.data
+        _LOGGER.debug('Getting oauth2 token')
+        auth_header = await async_get_oauth2_token(session, data[CONF_USERNAME], data[CONF_PASSWORD])
+        self.logins += 1
+        self._set_cached(OAUTH2_TOKEN, auth_header, OAUTH2_TOKEN_LIFETIME)
+        wss_credentials = await async_get_wss_credentials(session, auth_header)
+        self._set_cached(WSS_CREDENTIALS, wss_credentials, WSS_CREDENTIALS_LIFETIME)
+        return wss_credentials
+
+    def _schedule_refresh(self, delay: Optional[float] = None):
+        """Refresh the websocket credentials shortly before they expire."""
+        self.cancel()
+        if delay is None:
+            try:
+                expires_at = self._config_entry.data[CONF_CREDENTIALS][WSS_CREDENTIALS]["expires_at"]
+            except KeyError:
+                return
+            delay = max(expires_at - self.margin - time.time(), 0)
+        self._refresh_handle = self._hass.loop.call_later(
+            delay, lambda: self._create_task(self._async_refresh())
+        )
+
+    async def _async_refresh(self):
+        self._refresh_handle = None
+        _LOGGER.debug('Refreshing websocket credentials')
+        session = self._hass.helpers.aiohttp_client.async_get_clientsession()
+        try:
+            await self._async_fetch_wss_credentials(session)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.warning('Failed to refresh credentials, will retry', exc_info=True)
+            self._schedule_refresh(CREDENTIAL_REFRESH_RETRY)
+            return
+        self.refreshes += 1
+        self._schedule_refresh()
+
+    def cancel(self):
+        """Stop refreshing in the background."""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
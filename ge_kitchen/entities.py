@@ -1,16 +1,18 @@
 """Define all of the entity types"""
 
 import logging
-from typing import Any, Dict, Optional, TYPE_CHECKING
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, NamedTuple, Optional, Set, Tuple, TYPE_CHECKING
 
 from gekitchen import ErdCodeType, GeAppliance, translate_erd_code
 from gekitchen.erd_types import *
 from gekitchen.erd_constants import *
-from homeassistant.const import TEMP_CELSIUS, TEMP_FAHRENHEIT
+from homeassistant.const import DEVICE_CLASS_TEMPERATURE, TEMP_CELSIUS, TEMP_FAHRENHEIT
 from homeassistant.core import HomeAssistant
 
 
 from .const import DOMAIN
+from .exceptions import ErdWriteError
 from .erd_string_utils import *
 
 if TYPE_CHECKING:
@@ -161,17 +163,186 @@ def get_erd_icon(erd_code: ErdCodeType, value: Any = None) -> Optional[str]:
     return None
 
 
+class ErdFormat(NamedTuple):
+    """Precompiled rendering rules for a single ERD code"""
+    stringify: Callable[[Any, Optional[str]], Optional[str]]
+    units: Dict[ErdMeasurementUnits, str]
+    icon: Optional[str]
+    icon_rule: Optional[Callable[[Optional[str]], Optional[str]]]
+    device_class: Optional[str]
+
+
+def _stringify_by_type(value: Any, units: Optional[str] = None) -> Optional[str]:
+    """Stringify a value with no code-specific rules, dispatching on its type."""
+    try:
+        formatter = VALUE_TYPE_STRINGIFIERS[type(value)]
+    except KeyError:
+        return None if value is None else str(value)
+    return formatter(value, units)
+
+
+def _stringify_clock_time(value: Any, _: Optional[str] = None) -> Optional[str]:
+    return value.strftime("%H:%M:%S") if value else None
+
+
+def _stringify_raw_temperature(value: Any, _: Optional[str] = None) -> Optional[str]:
+    return f"{value}"
+
+
+def _stringify_nonzero_temperature(value: Any, _: Optional[str] = None) -> Optional[str]:
+    return f"{value}" if value else ""
+
+
+def _stringify_timer(value: Any, _: Optional[str] = None) -> Optional[str]:
+    return str(value)[:-3] if value else ""
+
+
+def _door_icon(state: Optional[str]) -> Optional[str]:
+    if not isinstance(state, str):
+        return None
+    if "open" in state.lower():
+        return "mdi:door-open"
+    return "mdi:door-closed"
+
+
+VALUE_TYPE_STRINGIFIERS = {
+    ErdOvenState: lambda value, _: oven_display_state_to_str(value),
+    OvenCookSetting: oven_cook_setting_to_str,
+    FridgeDoorStatus: lambda value, _: value.status,
+    FridgeIceBucketStatus: lambda value, _: bucket_status_to_str(value),
+    ErdFilterStatus: lambda value, _: value.name.capitalize(),
+    HotWaterStatus: lambda value, _: hot_water_status_str(value),
+    ErdDoorStatus: lambda value, _: door_status_to_str(value),
+}  # type: Dict[type, Callable[[Any, Optional[str]], Optional[str]]]
+
+CODE_STRINGIFIERS = {
+    ErdCode.CLOCK_TIME: _stringify_clock_time,
+    **{erd_code: _stringify_raw_temperature for erd_code in RAW_TEMPERATURE_ERD_CODES},
+    **{erd_code: _stringify_nonzero_temperature for erd_code in NONZERO_TEMPERATURE_ERD_CODES},
+    **{erd_code: _stringify_timer for erd_code in TIMER_ERD_CODES},
+}  # type: Dict[ErdCodeType, Callable[[Any, Optional[str]], Optional[str]]]
+
+
+def compile_erd_format(erd_code: ErdCodeType) -> ErdFormat:
+    """
+    Work out how to render an ERD code once, using the same rules as `stringify_erd_value`,
+    `get_erd_units` and `get_erd_icon`.
+
+    Values of the special types handled first by `stringify_erd_value` only ever come from the ERD
+    codes that decode to them, none of which have code-specific rules, so for a given code we can
+    pick the formatter up front.
+    """
+    erd_code = translate_erd_code(erd_code)
+    units = {
+        measurement_units: get_erd_units(erd_code, measurement_units)
+        for measurement_units in ErdMeasurementUnits
+    }
+    return ErdFormat(
+        stringify=CODE_STRINGIFIERS.get(erd_code, _stringify_by_type),
+        units={k: v for k, v in units.items() if v is not None},
+        icon=get_erd_icon(erd_code),
+        icon_rule=_door_icon if erd_code in DOOR_ERD_CODES else None,
+        device_class=DEVICE_CLASS_TEMPERATURE if erd_code in TEMPERATURE_ERD_CODES else None,
+    )
+
+
+ERD_FORMATS = {erd_code: compile_erd_format(erd_code) for erd_code in ErdCode}  # type: Dict[ErdCodeType, ErdFormat]
+
+
+def get_erd_format(erd_code: ErdCodeType) -> ErdFormat:
+    """Get the rendering rules for an ERD code, compiling them for codes gekitchen doesn't know."""
+    erd_code = translate_erd_code(erd_code)
+    try:
+        return ERD_FORMATS[erd_code]
+    except KeyError:
+        erd_format = ERD_FORMATS[erd_code] = compile_erd_format(erd_code)
+        return erd_format
+
+
+class rendered_property(property):
+    """
+    Property that is captured in its entity's render snapshot.
+
+    While the entity has a snapshot, the property is served from it rather than recomputed, so HA
+    reading the same properties over and over during a state write costs a dictionary lookup.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        snapshot = obj._snapshot
+        if snapshot is None:
+            return self.fget(obj)
+        try:
+            return snapshot[self.name]
+        except KeyError:
+            # Only happens while rendering, when the snapshot is still being filled in
+            value = snapshot[self.name] = self.fget(obj)
+            return value
+
+
 class GeEntity:
-    """Base class for all GE Entities"""
+    """
+    Base class for all GE Entities
+
+    Subclasses set `_unique_id` and `_name` once when constructed, since neither can change.
+    """
     should_poll = False
+    _rendered_names = ()  # type: Tuple[str, ...]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._rendered_names = tuple(sorted(
+            name for name in dir(cls)
+            if isinstance(getattr(cls, name, None), rendered_property)
+        ))
 
     def __init__(self, api: "ApplianceApi"):
         self._api = api
+        self._snapshot = None  # type: Optional[Mapping[str, Any]]
         self.hass = None  # type: Optional[HomeAssistant]
 
+    @property
+    def snapshot(self) -> Optional[Mapping[str, Any]]:
+        """Everything this entity showed as of its last render, if it's been rendered."""
+        return self._snapshot
+
+    def get_live_value(self, name: str) -> Any:
+        """
+        Compute a rendered property from the current state, bypassing the render snapshot.
+
+        The snapshot can lag the appliance (and any writes in flight) by a debounce window or a
+        throttle interval, so command logic should use this rather than reading the property.
+        """
+        snapshot, self._snapshot = self._snapshot, None
+        try:
+            return getattr(type(self), name).fget(self)
+        finally:
+            self._snapshot = snapshot
+
+    def refresh_snapshot(self) -> bool:
+        """
+        Render all of the entity's rendered properties once, and keep the result until the next render.
+
+        :return: True if anything rendered differs from the previous snapshot
+        """
+        previous = self._snapshot
+        self._snapshot = snapshot = {}
+        try:
+            for name in self._rendered_names:
+                getattr(self, name)
+        except Exception:
+            self._snapshot = None
+            raise
+        self._snapshot = MappingProxyType(snapshot)
+        return previous != snapshot
+
     @property
     def unique_id(self) -> str:
-        raise NotImplementedError
+        return self._unique_id
 
     @property
     def api(self) -> "ApplianceApi":
@@ -185,45 +356,85 @@ def device_info(self) -> Optional[Dict[str, Any]]:
     def serial_number(self):
         return self.api.serial_number
 
-    @property
+    @rendered_property
     def available(self) -> bool:
         return self.appliance.available
 
+    @rendered_property
+    def assumed_state(self) -> bool:
+        """True while showing state restored from the last run rather than live data."""
+        return self.api.stale
+
     @property
     def appliance(self) -> GeAppliance:
         return self.api.appliance
 
     @property
     def name(self) -> Optional[str]:
+        return self._name
+
+    @property
+    def erd_codes(self) -> Set[ErdCodeType]:
+        """The set of ERD codes this entity reads to render its state."""
         raise NotImplementedError
 
+    async def async_set_erd_values(self, values: Mapping[ErdCodeType, Any]):
+        """
+        Write ERD values as a single batch and wait for the appliance to acknowledge them.
+
+        :raises ApplianceUnavailable: if writes to the appliance are being rejected
+        :raises ErdWriteError: if any of the writes failed
+        """
+        if not values:
+            return
+        self.api.coordinator.write_scheduler.expedite(self)
+        results = await self.api.async_set_erd_values(values)
+        failures = {erd_code: err for erd_code, err in results.items() if err is not None}
+        if failures:
+            raise ErdWriteError(failures)
+
+    async def async_coalesce_erd_value(self, erd_code: ErdCodeType, update: Callable[[Any], Any], immediate: bool = False):
+        """
+        Write an ERD value through the coordinator's write coalescer, so rapid changes collapse into one write.
+
+        :param erd_code: The ERD code to write
+        :param update: Called with the latest value of the ERD to get the value to write
+        :param immediate: Send without waiting out the debounce window
+        :raises ApplianceUnavailable: if writes to the appliance are being rejected
+        :raises ErdWriteError: if the write failed
+        """
+        self.api.coordinator.write_scheduler.expedite(self)
+        err = await self.api.coordinator.write_coalescer.async_set_erd_value(self.api, erd_code, update, immediate)
+        if err is not None:
+            raise ErdWriteError({translate_erd_code(erd_code): err})
+
 
 class GeErdEntity(GeEntity):
     """Parent class for GE entities tied to a specific ERD"""
     def __init__(self, api: "ApplianceApi", erd_code: ErdCodeType):
         super().__init__(api)
-        self._erd_code = translate_erd_code(erd_code)
+        self._erd_code = erd_code = translate_erd_code(erd_code)
+        self._erd_format = get_erd_format(erd_code)
+        self._erd_string = erd_string = erd_code.name if isinstance(erd_code, ErdCode) else erd_code
+        self._name = " ".join(erd_string.split("_")).title()
+        self._unique_id = f"{DOMAIN}_{self.serial_number}_{erd_string.lower()}"
 
     @property
     def erd_code(self) -> ErdCodeType:
         return self._erd_code
 
     @property
-    def erd_string(self) -> str:
-        erd_code = self.erd_code
-        if isinstance(self.erd_code, ErdCode):
-            return erd_code.name
-        return erd_code
+    def erd_codes(self) -> Set[ErdCodeType]:
+        return {self.erd_code}
 
     @property
-    def name(self) -> Optional[str]:
-        erd_string = self.erd_string
-        return " ".join(erd_string.split("_")).title()
+    def erd_string(self) -> str:
+        return self._erd_string
 
     @property
-    def unique_id(self) -> Optional[str]:
-        return f"{DOMAIN}_{self.serial_number}_{self.erd_string.lower()}"
+    def erd_format(self) -> ErdFormat:
+        return self._erd_format
 
     @property
     def icon(self) -> Optional[str]:
-        return get_erd_icon(self.erd_code)
+        return self._erd_format.icon
@@ -0,0 +1,97 @@
+"""Declarative tables of the entities each type of appliance gets."""
+
+from typing import Callable, Dict, FrozenSet, Iterable, NamedTuple, Optional, Tuple, Type, TYPE_CHECKING
+
+from gekitchen import ErdCodeType
+from gekitchen.erd_constants import *
+from gekitchen.erd_types import *
+
+from homeassistant.helpers.entity import Entity
+
+from .binary_sensor import GeErdBinarySensor
+from .sensor import GeErdSensor
+from .switch import GeErdSwitch
+from .water_heater import (
+    GeFreezerEntity,
+    GeFridgeEntity,
+    GeOvenHeaterEntity,
+    LOWER_OVEN,
+    UPPER_OVEN,
+)
+
+if TYPE_CHECKING:
+    from .appliance_api import ApplianceApi
+
+
+class EntityDescriptor(NamedTuple):
+    """How to create one of an appliance's entities, and what it needs before we can"""
+    factory: Callable[["ApplianceApi"], Entity]
+    required_erds: FrozenSet[ErdCodeType] = frozenset()
+    predicate: Optional[Callable[["ApplianceApi"], bool]] = None
+
+
+def erd_entity(
+        entity_type: Type[Entity],
+        erd_code: ErdCodeType,
+        predicate: Optional[Callable[["ApplianceApi"], bool]] = None,
+        requires: Iterable[ErdCodeType] = ()) -> EntityDescriptor:
+    """Describe an entity for a single ERD code, which it requires along with anything in `requires`."""
+    return EntityDescriptor(
+        lambda api: entity_type(api, erd_code),
+        frozenset({erd_code, *requires}),
+        predicate,
+    )
+
+
+def has_lower_oven(api: "ApplianceApi") -> bool:
+    oven_config: OvenConfiguration = api.appliance.get_erd_value(ErdCode.OVEN_CONFIGURATION)
+    return oven_config.has_lower_oven
+
+
+def lacks_lower_oven(api: "ApplianceApi") -> bool:
+    return not has_lower_oven(api)
+
+
+OVEN_CONFIGURATION = frozenset({ErdCode.OVEN_CONFIGURATION})
+
+BASE_ENTITIES = (
+    erd_entity(GeErdSensor, ErdCode.CLOCK_TIME),
+    erd_entity(GeErdSwitch, ErdCode.SABBATH_MODE),
+)  # type: Tuple[EntityDescriptor, ...]
+
+OVEN_ENTITIES = BASE_ENTITIES + (
+    erd_entity(GeErdSensor, ErdCode.UPPER_OVEN_COOK_MODE),
+    erd_entity(GeErdSensor, ErdCode.UPPER_OVEN_COOK_TIME_REMAINING),
+    erd_entity(GeErdSensor, ErdCode.UPPER_OVEN_KITCHEN_TIMER),
+    erd_entity(GeErdSensor, ErdCode.UPPER_OVEN_USER_TEMP_OFFSET),
+    erd_entity(GeErdBinarySensor, ErdCode.UPPER_OVEN_REMOTE_ENABLED),
+    erd_entity(GeErdSensor, ErdCode.LOWER_OVEN_COOK_MODE, has_lower_oven, OVEN_CONFIGURATION),
+    erd_entity(GeErdSensor, ErdCode.LOWER_OVEN_COOK_TIME_REMAINING, has_lower_oven, OVEN_CONFIGURATION),
+    erd_entity(GeErdSensor, ErdCode.LOWER_OVEN_USER_TEMP_OFFSET, has_lower_oven, OVEN_CONFIGURATION),
+    erd_entity(GeErdBinarySensor, ErdCode.LOWER_OVEN_REMOTE_ENABLED, has_lower_oven, OVEN_CONFIGURATION),
+    EntityDescriptor(lambda api: GeOvenHeaterEntity(api, LOWER_OVEN, True), OVEN_CONFIGURATION, has_lower_oven),
+    EntityDescriptor(lambda api: GeOvenHeaterEntity(api, UPPER_OVEN, True), OVEN_CONFIGURATION, has_lower_oven),
+    EntityDescriptor(lambda api: GeOvenHeaterEntity(api, UPPER_OVEN, False), OVEN_CONFIGURATION, lacks_lower_oven),
+)  # type: Tuple[EntityDescriptor, ...]
+
+FRIDGE_ENTITIES = BASE_ENTITIES + (
+    # erd_entity(GeErdSensor, ErdCode.AIR_FILTER_STATUS),
+    erd_entity(GeErdSensor, ErdCode.DOOR_STATUS),
+    erd_entity(GeErdSensor, ErdCode.FRIDGE_MODEL_INFO),
+    # erd_entity(GeErdSensor, ErdCode.HOT_WATER_LOCAL_USE),
+    # erd_entity(GeErdSensor, ErdCode.HOT_WATER_SET_TEMP),
+    # erd_entity(GeErdSensor, ErdCode.HOT_WATER_STATUS),
+    EntityDescriptor(GeFreezerEntity),
+    EntityDescriptor(GeFridgeEntity),
+)  # type: Tuple[EntityDescriptor, ...]
+
+# Supporting a new type of appliance is a matter of adding its table here
+ENTITY_DESCRIPTORS = {
+    ErdApplianceType.OVEN: OVEN_ENTITIES,
+    ErdApplianceType.FRIDGE: FRIDGE_ENTITIES,
+}  # type: Dict[ErdApplianceType, Tuple[EntityDescriptor, ...]]
+
+
+def get_entity_descriptors(appliance_type: Optional[ErdApplianceType]) -> Tuple[EntityDescriptor, ...]:
+    """Get the descriptors for an appliance type, falling back to the entities every appliance has."""
+    return ENTITY_DESCRIPTORS.get(appliance_type, BASE_ENTITIES)
@@ -1,5 +1,8 @@
 """Exceptions go here."""
 
+from typing import Dict
+
+from gekitchen import ErdCodeType
 from homeassistant import exceptions as ha_exc
 
 
@@ -9,3 +12,16 @@ class CannotConnect(ha_exc.HomeAssistantError):
 
 class AuthError(ha_exc.HomeAssistantError):
     """Error to indicate authentication failure."""
+
+
+class ErdWriteError(ha_exc.HomeAssistantError):
+    """Error to indicate that an appliance didn't accept some ERD writes."""
+
+    def __init__(self, failures: Dict[ErdCodeType, Exception]):
+        self.failures = failures
+        codes = ", ".join(getattr(erd_code, "name", erd_code) for erd_code in failures)
+        super().__init__(f"Failed to set {codes}")
+
+
+class ApplianceUnavailable(ha_exc.HomeAssistantError):
+    """Error to indicate that commands to an appliance are being rejected without being sent."""
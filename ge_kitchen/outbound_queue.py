@@ -0,0 +1,244 @@
+"""Prioritized, rate limited queue for requests we send over the websocket."""
+
+import asyncio
+from collections import deque
+import logging
+from typing import Any, Awaitable, Callable, Coroutine, Deque, Dict, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    OUTBOUND_ACCOUNT_BURST,
+    OUTBOUND_ACCOUNT_RATE,
+    OUTBOUND_APPLIANCE_BURST,
+    OUTBOUND_APPLIANCE_RATE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PRIORITY_USER = 0  # Commands from the user, e.g. turning the oven off
+PRIORITY_REFRESH = 1  # Polls and other requests for appliance state
+PRIORITY_HOUSEKEEPING = 2  # Anything else, e.g. refreshing the roster
+PRIORITY_NAMES = {
+    PRIORITY_USER: "user",
+    PRIORITY_REFRESH: "refresh",
+    PRIORITY_HOUSEKEEPING: "housekeeping",
+}
+
+
+class TokenBucket:
+    """
+    Allow `rate` messages a second on average, in bursts of up to `capacity`.
+
+    A request costing more than `capacity` can go once the bucket is full, and is charged in
+    full, leaving the bucket in debt until it has refilled.
+    """
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        return self._tokens
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, now: float, cost: float = 1) -> float:
+        """Seconds until a request costing `cost` can go."""
+        self._refill(now)
+        missing = min(cost, self.capacity) - self._tokens
+        return max(missing / self.rate, 0)
+
+    def take(self, now: float, cost: float = 1):
+        self._refill(now)
+        self._tokens -= cost
+
+
+class _OutboundRequest:
+    __slots__ = ("send", "mac_addr", "cost", "future", "queued_at")
+
+    def __init__(
+            self,
+            send: Callable[[], Awaitable[Any]],
+            mac_addr: Optional[str],
+            cost: int,
+            future: asyncio.Future,
+            queued_at: float):
+        self.send = send
+        self.mac_addr = mac_addr
+        self.cost = cost
+        self.future = future
+        self.queued_at = queued_at
+
+
+class OutboundQueue:
+    """
+    Send requests one at a time, most important first, without going over the cloud's rate limits.
+
+    Requests are sent in priority order, first come first served within a priority.  Each one
+    spends tokens from the account's bucket and, if it's for an appliance, from that appliance's
+    bucket.  A request held up by its appliance's bucket lets requests for other appliances go
+    ahead of it, but one held up by the account's bucket holds up everything behind it, so less
+    important requests can't use up tokens it's waiting on.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            create_task: Optional[Callable[[Coroutine], Any]] = None,
+            appliance_rate: float = OUTBOUND_APPLIANCE_RATE,
+            appliance_burst: float = OUTBOUND_APPLIANCE_BURST,
+            account_rate: float = OUTBOUND_ACCOUNT_RATE,
+            account_burst: float = OUTBOUND_ACCOUNT_BURST):
+        """
+        :param hass: HomeAssistant instance
+        :param create_task: Function used to start the consumer, defaults to `hass.async_create_task`
+        :param appliance_rate: Messages a second allowed per appliance
+        :param appliance_burst: Messages an appliance can send at once after a quiet spell
+        :param account_rate: Messages a second allowed for the whole account
+        :param account_burst: Messages the account can send at once after a quiet spell
+        """
+        self._hass = hass
+        self._create_task = create_task or hass.async_create_task
+        self._appliance_rate = appliance_rate
+        self._appliance_burst = appliance_burst
+        self._account_bucket = TokenBucket(account_rate, account_burst, hass.loop.time())
+        self._appliance_buckets = {}  # type: Dict[str, TokenBucket]
+        self._queues = {priority: deque() for priority in PRIORITY_NAMES}  # type: Dict[int, Deque[_OutboundRequest]]
+        self._consumer = None  # type: Optional[asyncio.Task]
+        self._wakeup = asyncio.Event()
+        self.sent = {priority: 0 for priority in PRIORITY_NAMES}  # type: Dict[int, int]
+        self.total_wait = {priority: 0.0 for priority in PRIORITY_NAMES}  # type: Dict[int, float]
+        self.max_wait = {priority: 0.0 for priority in PRIORITY_NAMES}  # type: Dict[int, float]
+
+    @property
+    def depth(self) -> int:
+        """Number of requests waiting to be sent."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        stats = {"outbound_queue_depth": self.depth}
+        for priority, name in PRIORITY_NAMES.items():
+            sent = self.sent[priority]
+            stats[f"outbound_{name}_sent"] = sent
+            stats[f"outbound_{name}_wait_avg"] = round(self.total_wait[priority] / sent, 3) if sent else 0
+            stats[f"outbound_{name}_wait_max"] = round(self.max_wait[priority], 3)
+        return stats
+
+    async def async_send(
+            self,
+            send: Callable[[], Awaitable[Any]],
+            priority: int,
+            mac_addr: Optional[str] = None,
+            cost: int = 1) -> Any:
+        """
+        Queue a request and wait for it to be sent.
+
+        :param send: Sends the request, once it's our turn
+        :param priority: One of the `PRIORITY_*` constants
+        :param mac_addr: The appliance the request is for, if any
+        :param cost: Number of messages `send` sends
+        :return: Whatever `send` returns
+        """
+        future = self._hass.loop.create_future()
+        self._queues[priority].append(_OutboundRequest(send, mac_addr, cost, future, self._hass.loop.time()))
+        self._wakeup.set()
+        if self._consumer is None:
+            self._consumer = self._create_task(self._async_consume())
+            if self._consumer is None:
+                # Shutting down
+                self.clear()
+        return await future
+
+    def _get_bucket(self, mac_addr: str, now: float) -> TokenBucket:
+        try:
+            return self._appliance_buckets[mac_addr]
+        except KeyError:
+            bucket = self._appliance_buckets[mac_addr] = TokenBucket(self._appliance_rate, self._appliance_burst, now)
+            return bucket
+
+    def _next_request(self, now: float) -> Tuple[Optional[_OutboundRequest], float]:
+        """
+        Take the next request that can be sent now.
+
+        :return: The request, or None and how long until one might be ready
+        """
+        wait = None
+        for priority, queue in self._queues.items():
+            index = 0
+            while index < len(queue):
+                request = queue[index]
+                if request.future.done():
+                    # The caller gave up on it
+                    del queue[index]
+                    continue
+                account_delay = self._account_bucket.delay(now, request.cost)
+                if account_delay > 0:
+                    return None, account_delay if wait is None else min(wait, account_delay)
+                if request.mac_addr is not None:
+                    appliance_delay = self._get_bucket(request.mac_addr, now).delay(now, request.cost)
+                    if appliance_delay > 0:
+                        wait = appliance_delay if wait is None else min(wait, appliance_delay)
+                        index += 1
+                        continue
+                    self._get_bucket(request.mac_addr, now).take(now, request.cost)
+                self._account_bucket.take(now, request.cost)
+                del queue[index]
+                waited = now - request.queued_at
+                self.sent[priority] += 1
+                self.total_wait[priority] += waited
+                self.max_wait[priority] = max(self.max_wait[priority], waited)
+                return request, 0
+        return None, wait
+
+    async def _async_consume(self):
+        try:
+            while self.depth:
+                self._wakeup.clear()
+                request, wait = self._next_request(self._hass.loop.time())
+                if request is None:
+                    if wait is None:
+                        # Everything left was abandoned
+                        continue
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                try:
+                    result = await request.send()
+                except asyncio.CancelledError:
+                    request.future.cancel()
+                    raise
+                except Exception as err:  # pylint: disable=broad-except
+                    if not request.future.done():
+                        request.future.set_exception(err)
+                else:
+                    if not request.future.done():
+                        request.future.set_result(result)
+        finally:
+            self._consumer = None
+
+    def discard(self, mac_addr: str):
+        """Drop everything queued for an appliance."""
+        self._appliance_buckets.pop(mac_addr, None)
+        for queue in self._queues.values():
+            for request in [request for request in queue if request.mac_addr == mac_addr]:
+                queue.remove(request)
+                request.future.cancel()
+
+    def clear(self):
+        """Drop everything queued and stop the consumer."""
+        for queue in self._queues.values():
+            for request in queue:
+                request.future.cancel()
+            queue.clear()
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
@@ -0,0 +1,151 @@
+"""Central scheduler for periodic appliance polls."""
+
+import asyncio
+import heapq
+import logging
+import random
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant
+
+from .const import POLL_JITTER
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """
+    Poll every appliance from a single timer.
+
+    Due times are kept in a heap keyed by appliance, so there is only ever one pending timer no
+    matter how many appliances there are.  Each appliance's interval is re-evaluated whenever it is
+    scheduled, intervals are jittered so polls don't line up, and a poll is skipped if a push
+    update for that appliance arrived within the interval.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            poll: Callable[[str], Awaitable[None]],
+            get_interval: Callable[[str], float],
+            jitter: float = POLL_JITTER,
+            create_task: Optional[Callable[[Coroutine], Any]] = None):
+        """
+        :param hass: HomeAssistant instance
+        :param poll: Coroutine function to poll an appliance, called with the appliance key
+        :param get_interval: Function returning the current poll interval (seconds) for an appliance key
+        :param jitter: Fraction of the interval by which to randomly perturb each due time
+        :param create_task: Function used to start each poll, defaults to `hass.async_create_task`
+        """
+        self._hass = hass
+        self._create_task = create_task or hass.async_create_task
+        self._poll = poll
+        self._get_interval = get_interval
+        self.jitter = jitter
+        self._heap = []  # type: List[Tuple[float, str]]
+        self._due = {}  # type: Dict[str, float]
+        self._last_push = {}  # type: Dict[str, float]
+        self._timer = None  # type: Optional[asyncio.TimerHandle]
+        self._timer_when = None  # type: Optional[float]
+        self._stopped = False
+        self.polls = 0
+        self.polls_skipped = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "polled_appliances": len(self._due),
+            "polls": self.polls,
+            "polls_skipped": self.polls_skipped,
+        }
+
+    def _now(self) -> float:
+        return self._hass.loop.time()
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def add(self, key: str):
+        """Start polling an appliance."""
+        if self._stopped or key in self._due:
+            return
+        self._schedule(key, self._now() + self._jittered(self._get_interval(key)))
+
+    def remove(self, key: str):
+        """Stop polling an appliance.  Its stale heap entry is discarded when it comes due."""
+        self._due.pop(key, None)
+        self._last_push.pop(key, None)
+
+    def note_push(self, key: str):
+        """Record a push update, pulling the next poll in if the interval has shrunk."""
+        now = self._now()
+        self._last_push[key] = now
+        try:
+            due = self._due[key]
+        except KeyError:
+            return
+        new_due = now + self._jittered(self._get_interval(key))
+        if new_due < due:
+            self._schedule(key, new_due)
+
+    def reschedule(self):
+        """Re-evaluate every appliance's next poll, e.g. because the intervals have been changed."""
+        now = self._now()
+        for key in list(self._due):
+            self._schedule(key, now + self._jittered(self._get_interval(key)))
+
+    def stop(self):
+        """Stop polling everything, for good, e.g. because we're unloading."""
+        self._stopped = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_when = None
+        self._heap.clear()
+        self._due.clear()
+        self._last_push.clear()
+
+    def _schedule(self, key: str, due: float):
+        self._due[key] = due
+        heapq.heappush(self._heap, (due, key))
+        self._arm()
+
+    def _arm(self):
+        """Make sure the timer is set for the earliest live due time."""
+        heap = self._heap
+        while heap and self._due.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        if not heap:
+            return
+        when = heap[0][0]
+        if self._timer is not None:
+            if self._timer_when <= when:
+                return
+            self._timer.cancel()
+        self._timer_when = when
+        self._timer = self._hass.loop.call_at(when, self._fire)
+
+    def _fire(self):
+        self._timer = None
+        self._timer_when = None
+        if self._stopped:
+            return
+        now = self._now()
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due, key = heapq.heappop(heap)
+            if self._due.get(key) != due:
+                # Rescheduled or removed
+                continue
+            interval = self._get_interval(key)
+            last_push = self._last_push.get(key)
+            if last_push is not None and now - last_push < interval:
+                # Only jitter forwards here so the new due time is always in the future
+                self.polls_skipped += 1
+                self._due[key] = last_push + interval * (1 + random.uniform(0, self.jitter))
+            else:
+                self.polls += 1
+                self._create_task(self._poll(key))
+                self._due[key] = now + self._jittered(interval)
+            heapq.heappush(heap, (self._due[key], key))
+        self._arm()
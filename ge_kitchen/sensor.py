@@ -1,24 +1,19 @@
 """GE Kitchen Sensor Entities"""
-import async_timeout
+from datetime import datetime, timedelta
 import logging
-from typing import Optional, Callable, TYPE_CHECKING
+from typing import Any, Callable, Dict, Optional, Set, TYPE_CHECKING
 
 from gekitchen import ErdCodeType
 from gekitchen.erd_constants import *
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import DEVICE_CLASS_TEMPERATURE, TEMP_CELSIUS, TEMP_FAHRENHEIT
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.event import async_track_time_interval
 
-from .const import DOMAIN
-from .entities import (
-    TEMPERATURE_ERD_CODES,
-    GeErdEntity,
-    get_erd_icon,
-    get_erd_units,
-    stringify_erd_value,
-)
+from .const import DIAGNOSTICS_UPDATE_INTERVAL, DOMAIN
+from .entities import GeErdEntity, rendered_property, stringify_erd_value
 
 if TYPE_CHECKING:
     from .update_coordinator import GeKitchenUpdateCoordinator
@@ -31,32 +26,40 @@
 class GeErdSensor(GeErdEntity, Entity):
     """GE Entity for sensors"""
     @property
+    def erd_codes(self) -> Set[ErdCodeType]:
+        return {self.erd_code, ErdCode.TEMPERATURE_UNIT}
+
+    @rendered_property
     def state(self) -> Optional[str]:
         try:
-            value = self.appliance.get_erd_value(self.erd_code)
+            value = self.api.get_erd_value(self.erd_code)
         except KeyError:
             return None
-        return stringify_erd_value(self.erd_code, value, self.units)
+        return self.erd_format.stringify(value, self.units)
 
     @property
     def measurement_system(self) -> Optional[ErdMeasurementUnits]:
-        return self.appliance.get_erd_value(ErdCode.TEMPERATURE_UNIT)
+        return self.api.get_erd_value(ErdCode.TEMPERATURE_UNIT)
 
-    @property
+    @rendered_property
     def units(self) -> Optional[str]:
-        return get_erd_units(self.erd_code, self.measurement_system)
+        units = self.erd_format.units
+        if not units:
+            return None
+        return units.get(self.measurement_system)
 
     @property
     def device_class(self) -> Optional[str]:
-        if self.erd_code in TEMPERATURE_ERD_CODES:
-            return DEVICE_CLASS_TEMPERATURE
-        return None
+        return self.erd_format.device_class
 
-    @property
+    @rendered_property
     def icon(self) -> Optional[str]:
-        return get_erd_icon(self.erd_code, self.state)
+        icon_rule = self.erd_format.icon_rule
+        if icon_rule is None:
+            return self.erd_format.icon
+        return icon_rule(self.state)
 
-    @property
+    @rendered_property
     def unit_of_measurement(self) -> Optional[str]:
         if self.device_class == DEVICE_CLASS_TEMPERATURE:
             return self.units
@@ -67,38 +70,55 @@ class GeErdPropertySensor(GeErdSensor):
     def __init__(self, api: "ApplianceApi", erd_code: ErdCodeType, erd_property: str):
         super().__init__(api, erd_code)
         self.erd_property = erd_property
+        property_name = erd_property.replace("_", " ").title()
+        self._unique_id = f"{self._unique_id}_{erd_property}"
+        self._name = f"{self._name} {property_name}"
 
-    @property
-    def unique_id(self) -> Optional[str]:
-        return f"{super().unique_id}_{self.erd_property}"
-
-    @property
-    def name(self) -> Optional[str]:
-        base_string = super().name
-        property_name = self.erd_property.replace("_", " ").title()
-        return f"{base_string} {property_name}"
-
-    @property
+    @rendered_property
     def state(self) -> Optional[str]:
+        # Properties of ERD values aren't covered by the ERD code's format, so dispatch on the value
         try:
-            value = getattr(self.appliance.get_erd_value(self.erd_code), self.erd_property)
+            value = getattr(self.api.get_erd_value(self.erd_code), self.erd_property)
         except KeyError:
             return None
         return stringify_erd_value(self.erd_code, value, self.units)
 
+
+class GeKitchenDiagnosticsSensor(Entity):
+    """
+    Integration-level sensor exposing the coordinator's runtime statistics
+
+    The counters change all the time, so rather than being polled (and recorded) every 30 seconds
+    like other entities, the sensor writes its state on a much coarser interval.
+    """
+    icon = "mdi:information-outline"
+    name = "GE Kitchen Diagnostics"
+    should_poll = False
+
+    def __init__(self, coordinator: "GeKitchenUpdateCoordinator"):
+        self._coordinator = coordinator
+        self._unique_id = f"{DOMAIN}_{coordinator.config_entry.entry_id}_diagnostics"
+
+    async def async_added_to_hass(self):
+        self.async_on_remove(async_track_time_interval(
+            self.hass, self._write_diagnostics, timedelta(seconds=DIAGNOSTICS_UPDATE_INTERVAL)
+        ))
+
+    @callback
+    def _write_diagnostics(self, _now: datetime):
+        self.async_write_ha_state()
+
     @property
-    def measurement_system(self) -> Optional[ErdMeasurementUnits]:
-        return self.appliance.get_erd_value(ErdCode.TEMPERATURE_UNIT)
+    def unique_id(self) -> str:
+        return self._unique_id
 
     @property
-    def units(self) -> Optional[str]:
-        return get_erd_units(self.erd_code, self.measurement_system)
+    def state(self) -> int:
+        return len(self._coordinator.appliance_apis)
 
     @property
-    def device_class(self) -> Optional[str]:
-        if self.erd_code in TEMPERATURE_ERD_CODES:
-            return "temperature"
-        return None
+    def device_state_attributes(self) -> Dict[str, Any]:
+        return self._coordinator.diagnostics
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, async_add_entities: Callable):
@@ -106,18 +126,8 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     _LOGGER.debug('Adding GE Kitchen sensors')
     coordinator: "GeKitchenUpdateCoordinator" = hass.data[DOMAIN][config_entry.entry_id]
 
-    # This should be a NOP, but let's be safe
-    with async_timeout.timeout(20):
-        await coordinator.initialization_future
-    _LOGGER.debug('Coordinator init future finished')
-
-    apis = list(coordinator.appliance_apis.values())
-    _LOGGER.debug(f'Found {len(apis):d} appliance APIs')
-    entities = [
-        entity
-        for api in apis
-        for entity in api.entities
-        if isinstance(entity, GeErdSensor) and entity.erd_code in api.appliance._property_cache
-    ]
-    _LOGGER.debug(f'Found {len(entities):d} sensors')
-    async_add_entities(entities)
+    async_add_entities([GeKitchenDiagnosticsSensor(coordinator)])
+    coordinator.add_entity_platform(
+        async_add_entities,
+        lambda api, entity: isinstance(entity, GeErdSensor) and entity.erd_code in api.appliance._property_cache
+    )
@@ -0,0 +1,149 @@
+"""Persistent snapshot of the roster and raw ERD values, used to warm start."""
+
+import logging
+from typing import Dict, Iterable, Set
+
+from gekitchen import ErdCode, ErdCodeType
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_VERSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# ERD codes that change too often to be worth saving for, e.g. the clock changes every minute
+VOLATILE_ERD_CODES = {ErdCode.CLOCK_TIME}
+
+
+def get_raw_erd_code(erd_code: ErdCodeType) -> str:
+    """Format an ERD code the way the websocket API does."""
+    if isinstance(erd_code, ErdCode):
+        erd_code = erd_code.value
+    return erd_code.upper().replace("0X", "0x")
+
+
+class ApplianceSnapshot:
+    """
+    Keep the last raw ERD values we've seen for each appliance, and persist them in HA storage.
+
+    Raw values are kept rather than decoded ones so that restoring is just a matter of feeding
+    them back through `GeAppliance.update_erd_values`, which also restores each appliance's type
+    and oven configuration.  The roster and each appliance are stored separately, so a save only
+    rewrites the appliances that actually changed, and saves are delayed so that a burst of
+    updates results in a single write.
+
+    Since these are the last values we passed on for each appliance, they are also used to work
+    out which ERDs in an update actually changed.  Changes to volatile ERDs are tracked like any
+    other, but don't cause a save on their own, otherwise something like the clock would have
+    every appliance rewritten on every save.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, delay: float = SNAPSHOT_SAVE_DELAY):
+        self._hass = hass
+        self._key = f"{DOMAIN}.{entry_id}"
+        self.delay = delay
+        self._roster_store = Store(hass, SNAPSHOT_STORAGE_VERSION, self._key)
+        self._stores = {}  # type: Dict[str, Store]
+        self._erd_values = {}  # type: Dict[str, Dict[str, str]]
+        self._pending = set()  # type: Set[str]
+        self._roster_pending = False
+        self._volatile_erd_codes = set()  # type: Set[str]
+        self.volatile_erd_codes = VOLATILE_ERD_CODES
+        self.saves = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "snapshot_appliances": len(self._erd_values),
+            "snapshot_saves": self.saves,
+        }
+
+    @property
+    def volatile_erd_codes(self) -> Set[str]:
+        """Raw ERD codes whose changes don't, on their own, cause a save."""
+        return self._volatile_erd_codes
+
+    @volatile_erd_codes.setter
+    def volatile_erd_codes(self, erd_codes: Iterable[ErdCodeType]):
+        self._volatile_erd_codes = {get_raw_erd_code(erd_code) for erd_code in erd_codes}
+
+    def _get_store(self, mac_addr: str) -> Store:
+        try:
+            return self._stores[mac_addr]
+        except KeyError:
+            store = self._stores[mac_addr] = Store(
+                self._hass, SNAPSHOT_STORAGE_VERSION, f"{self._key}.{mac_addr.lower()}"
+            )
+            return store
+
+    async def async_load(self) -> Dict[str, Dict[str, str]]:
+        """Load the snapshot, returning the raw ERD values for each appliance by MAC address."""
+        roster = await self._roster_store.async_load() or {}
+        for mac_addr in roster.get("appliances", []):
+            data = await self._get_store(mac_addr).async_load()
+            if data and data.get("erd_values"):
+                self._erd_values[mac_addr] = dict(data["erd_values"])
+        _LOGGER.debug(f"Loaded snapshot of {len(self._erd_values):d} appliances")
+        return {mac_addr: dict(erd_values) for mac_addr, erd_values in self._erd_values.items()}
+
+    def record(self, mac_addr: str, updates: Dict[ErdCodeType, str]) -> Set[str]:
+        """
+        Record raw ERD values received for an appliance, saving them later if anything changed.
+
+        :return: The raw ERD codes whose values differ from what we last had
+        """
+        erd_values = self._erd_values.get(mac_addr)
+        if erd_values is None:
+            erd_values = self._erd_values[mac_addr] = {}
+            self._schedule_roster_save()
+        changed = set()
+        for erd_code, value in updates.items():
+            raw_erd_code = get_raw_erd_code(erd_code)
+            if erd_values.get(raw_erd_code) != value:
+                erd_values[raw_erd_code] = value
+                changed.add(raw_erd_code)
+        if changed and not changed <= self._volatile_erd_codes:
+            self._schedule_save(mac_addr)
+        return changed
+
+    def retain(self, mac_addrs: Iterable[str]):
+        """Forget any appliance not in `mac_addrs`."""
+        mac_addrs = set(mac_addrs)
+        for mac_addr in list(self._erd_values):
+            if mac_addr not in mac_addrs:
+                del self._erd_values[mac_addr]
+                self._pending.discard(mac_addr)
+                self._hass.async_create_task(self._get_store(mac_addr).async_remove())
+                self._stores.pop(mac_addr)
+                self._schedule_roster_save()
+
+    async def async_remove(self):
+        """Delete the whole snapshot from storage."""
+        await self._roster_store.async_remove()
+        for mac_addr in self._erd_values:
+            await self._get_store(mac_addr).async_remove()
+        self._erd_values.clear()
+        self._pending.clear()
+
+    def _schedule_roster_save(self):
+        if self._roster_pending:
+            return
+        self._roster_pending = True
+        self._roster_store.async_delay_save(self._roster_data, self.delay)
+
+    def _schedule_save(self, mac_addr: str):
+        # Only schedule once per save, since rescheduling would keep pushing the write back
+        if mac_addr in self._pending:
+            return
+        self._pending.add(mac_addr)
+        self._get_store(mac_addr).async_delay_save(lambda: self._appliance_data(mac_addr), self.delay)
+
+    def _roster_data(self) -> Dict:
+        self._roster_pending = False
+        return {"appliances": sorted(self._erd_values)}
+
+    def _appliance_data(self, mac_addr: str) -> Dict:
+        self._pending.discard(mac_addr)
+        self.saves += 1
+        return {"erd_values": dict(self._erd_values.get(mac_addr, {}))}
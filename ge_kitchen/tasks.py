@@ -0,0 +1,46 @@
+"""Supervision of the integration's background tasks."""
+
+import asyncio
+import logging
+from typing import Coroutine, Optional, Set
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TaskGroup:
+    """
+    Keep track of background tasks so they can all be cancelled together.
+
+    Tasks are forgotten as soon as they finish, so the group only ever holds live tasks.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._tasks = set()  # type: Set[asyncio.Future]
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def create_task(self, coro: Coroutine) -> Optional[asyncio.Future]:
+        """Schedule a coroutine as a task owned by this group, unless the group has been cancelled."""
+        if self._closed:
+            _LOGGER.debug(f"Not starting {coro!r} after shutdown")
+            coro.close()
+            return None
+        task = self._hass.async_create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def async_cancel(self):
+        """Cancel every task and wait for them to finish.  No new tasks can be added afterwards."""
+        self._closed = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            _LOGGER.debug(f"Cancelling {len(tasks):d} background tasks")
+            await asyncio.gather(*tasks, return_exceptions=True)
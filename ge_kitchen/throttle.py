@@ -0,0 +1,114 @@
+"""Per-ERD throttling of entity refreshes."""
+
+import asyncio
+import logging
+import re
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+from gekitchen import ErdCode, ErdCodeType, translate_erd_code
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+RAW_ERD_CODE_RE = re.compile(r"^0x[0-9a-f]{4}$", re.IGNORECASE)
+
+
+def parse_erd_throttles(value: str) -> Dict[ErdCodeType, float]:
+    """
+    Parse throttles given as comma-separated `ERD=SECONDS` pairs, e.g. "CLOCK_TIME=60, 0x5104=5".
+
+    ERD codes can be given by name or as raw codes.
+
+    :raises ValueError: if anything can't be parsed
+    """
+    throttles = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            name, seconds = item.split("=")
+            seconds = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid ERD throttle: {item}")
+        erd_code = translate_erd_code(name.strip())
+        if not isinstance(erd_code, ErdCode) and not RAW_ERD_CODE_RE.match(erd_code):
+            raise ValueError(f"Unknown ERD code: {name}")
+        if seconds < 0:
+            raise ValueError(f"Invalid ERD throttle: {item}")
+        throttles[erd_code] = seconds
+    return throttles
+
+
+class ErdThrottle:
+    """
+    Limit how often changes to particular ERD codes are passed on to entities.
+
+    A change arriving within an ERD's interval of the last one we passed on is held back and
+    released once the interval is up.  Entities render from the appliance's current state, so
+    however many changes were held back, releasing them shows the latest value.
+    """
+
+    def __init__(self, hass: HomeAssistant, release: Callable[[str, Set[ErdCodeType]], None]):
+        """
+        :param hass: HomeAssistant instance
+        :param release: Called with an appliance key and the held back ERD codes when they're due
+        """
+        self._hass = hass
+        self._release = release
+        self._intervals = {}  # type: Dict[ErdCodeType, float]
+        self._last_passed = {}  # type: Dict[Tuple[str, ErdCodeType], float]
+        self._held = {}  # type: Dict[Tuple[str, ErdCodeType], asyncio.TimerHandle]
+        self.throttled = 0
+
+    @property
+    def intervals(self) -> Dict[ErdCodeType, float]:
+        return self._intervals
+
+    @intervals.setter
+    def intervals(self, intervals: Dict[ErdCodeType, float]):
+        self._intervals = {translate_erd_code(erd_code): interval for erd_code, interval in intervals.items()}
+
+    def filter(self, key: str, erd_codes: Iterable[ErdCodeType]) -> Set[ErdCodeType]:
+        """Get the ERD codes that can be passed on now, holding back the rest."""
+        if not self._intervals:
+            return {translate_erd_code(erd_code) for erd_code in erd_codes}
+        now = self._hass.loop.time()
+        passed = set()
+        for erd_code in erd_codes:
+            erd_code = translate_erd_code(erd_code)
+            interval = self._intervals.get(erd_code)
+            if not interval:
+                passed.add(erd_code)
+                continue
+            held_key = (key, erd_code)
+            if held_key in self._held:
+                self.throttled += 1
+                continue
+            last = self._last_passed.get(held_key)
+            if last is not None and now - last < interval:
+                self.throttled += 1
+                self._held[held_key] = self._hass.loop.call_at(last + interval, self._release_held, key, erd_code)
+                continue
+            self._last_passed[held_key] = now
+            passed.add(erd_code)
+        return passed
+
+    def _release_held(self, key: str, erd_code: ErdCodeType):
+        self._held.pop((key, erd_code), None)
+        self._last_passed[(key, erd_code)] = self._hass.loop.time()
+        self._release(key, {erd_code})
+
+    def discard(self, key: str):
+        """Forget everything about an appliance."""
+        for held_key in [held_key for held_key in self._held if held_key[0] == key]:
+            self._held.pop(held_key).cancel()
+        for passed_key in [passed_key for passed_key in self._last_passed if passed_key[0] == key]:
+            del self._last_passed[passed_key]
+
+    def cancel(self):
+        """Drop everything held back."""
+        for handle in self._held.values():
+            handle.cancel()
+        self._held.clear()
@@ -2,7 +2,8 @@
 
 import asyncio
 import logging
-from typing import Any, Dict, Iterable, Optional, Tuple
+import random
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
 
 from gekitchen import (
     EVENT_APPLIANCE_INITIAL_UPDATE,
@@ -12,38 +13,137 @@
     EVENT_GOT_APPLIANCE_LIST,
     ErdCodeType,
     GeAppliance,
+    GeAuthError,
     GeWebsocketClient,
 )
+import websockets
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry, entity_registry
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, EVENT_ALL_APPLIANCES_READY, UPDATE_INTERVAL
+from .const import (
+    APPLIANCE_READY_TIMEOUT,
+    APPLIANCE_REMOVAL_GRACE_PERIOD,
+    APPLIANCE_REMOVAL_ROSTERS,
+    CONF_APPLIANCE_READY_TIMEOUT,
+    CONF_ERD_THROTTLES,
+    CONF_POLL_INTERVAL,
+    CONF_POLL_INTERVAL_ACTIVE,
+    CONF_POLL_INTERVAL_IDLE,
+    CONF_STATE_WRITE_DEBOUNCE,
+    DOMAIN,
+    EVENT_ALL_APPLIANCES_READY,
+    RECONNECT_GRACE_PERIOD,
+    RECONNECT_MAX_DELAY,
+    RECONNECT_MIN_DELAY,
+    ROSTER_REFRESH_INTERVAL,
+    STATE_WRITE_DEBOUNCE,
+    UPDATE_INTERVAL,
+    UPDATE_INTERVAL_ACTIVE,
+    UPDATE_INTERVAL_IDLE,
+)
 from .appliance_api import ApplianceApi, get_appliance_api_type
+from .credentials import CredentialCache
+from .poll_scheduler import PollScheduler
+from .snapshot import ApplianceSnapshot, VOLATILE_ERD_CODES
+from .tasks import TaskGroup
+from .throttle import ErdThrottle, parse_erd_throttles
+from .update_queue import InboundUpdateQueue
+from .outbound_queue import OutboundQueue, PRIORITY_HOUSEKEEPING, PRIORITY_REFRESH
+from .write_coalescer import ErdWriteCoalescer
+from .write_scheduler import StateWriteScheduler
+
+if TYPE_CHECKING:
+    from .entities import GeEntity
 
 _LOGGER = logging.getLogger(__name__)
 
+EntityPredicate = Callable[[ApplianceApi, "GeEntity"], bool]
+
 
 class GeKitchenUpdateCoordinator(DataUpdateCoordinator):
     """Define a wrapper class to update Shark IQ data."""
 
     def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
         """Set up the SharkIqUpdateCoordinator class."""
+        # First, so that it can't clobber anything we set below
+        super().__init__(hass, _LOGGER, name=DOMAIN)
         self._hass = hass
         self._config_entry = config_entry
         self._username = config_entry.data[CONF_USERNAME]
         self._password = config_entry.data[CONF_PASSWORD]
         self.client = None  # type: Optional[GeWebsocketClient]
         self._appliance_apis = {}  # type: Dict[str, ApplianceApi]
+        self.tasks = TaskGroup(hass)
+        self.write_scheduler = StateWriteScheduler(hass)
+        self.update_queue = InboundUpdateQueue(hass, self._process_device_update, create_task=self.tasks.create_task)
+        self.poll_scheduler = PollScheduler(
+            hass, self.async_poll_appliance, self._get_poll_interval, create_task=self.tasks.create_task
+        )
+        self.credentials = CredentialCache(hass, config_entry, create_task=self.tasks.create_task)
+        self.erd_throttle = ErdThrottle(hass, self._schedule_erd_entities)
+        self.write_coalescer = ErdWriteCoalescer(hass, create_task=self.tasks.create_task)
+        self.outbound_queue = OutboundQueue(hass, create_task=self.tasks.create_task)
+        self.snapshot = ApplianceSnapshot(hass, config_entry.entry_id)
+        self._restored = False
+        self._stale_appliances = set()  # type: Set[str]
+        self._refresh_on_roster = set()  # type: Set[str]
+        self._missing_appliances = {}  # type: Dict[str, Tuple[int, float]]
+        self._client_task = None  # type: Optional[asyncio.Future]
+        self._connected = False
+        self._shutting_down = False
+        self._reconnect_attempt = 0
+        self._grace_handle = None  # type: Optional[asyncio.TimerHandle]
+        self._roster_handle = None  # type: Optional[asyncio.TimerHandle]
+        self.reconnects = 0
+        self.updates_received = 0
+        self.updates_unchanged = 0
+        self._entity_platforms = []  # type: List[Tuple[Callable, EntityPredicate]]
 
         # Some record keeping to let us know when we can start generating entities
         self._got_roster = False
-        self._init_done = False
+        self._ready_deadlines = {}  # type: Dict[str, asyncio.TimerHandle]
+        self._timed_out_appliances = set()  # type: Set[str]
+        self._start_time = None  # type: Optional[float]
+        self.startup_latency = None  # type: Optional[float]
         self.initialization_future = asyncio.Future()
 
-        super().__init__(hass, _LOGGER, name=DOMAIN)
+        # Tunables, which can be changed through the options flow.  Note that `update_interval` belongs to
+        # DataUpdateCoordinator, so we don't use it for polling.
+        self.poll_interval = UPDATE_INTERVAL  # type: float
+        self.poll_interval_active = UPDATE_INTERVAL_ACTIVE  # type: float
+        self.poll_interval_idle = UPDATE_INTERVAL_IDLE  # type: float
+        self.appliance_ready_timeout = APPLIANCE_READY_TIMEOUT  # type: float
+        self.remove_update_listener = None  # type: Optional[Callable[[], None]]
+        self._applied_options = None  # type: Optional[Dict[str, Any]]
+        self.apply_options(config_entry.options)
+
+    def apply_options(self, options: Dict[str, Any]):
+        """
+        Apply the entry's options to the running coordinator, without reconnecting.
+
+        The entry's update listeners also fire whenever its data changes (e.g. when the cached
+        credentials are refreshed), so options that haven't changed are ignored.
+        """
+        if options == self._applied_options:
+            return
+        self._applied_options = dict(options)
+        self.poll_interval = options.get(CONF_POLL_INTERVAL, UPDATE_INTERVAL)
+        self.poll_interval_active = options.get(CONF_POLL_INTERVAL_ACTIVE, UPDATE_INTERVAL_ACTIVE)
+        self.poll_interval_idle = options.get(CONF_POLL_INTERVAL_IDLE, UPDATE_INTERVAL_IDLE)
+        self.appliance_ready_timeout = options.get(CONF_APPLIANCE_READY_TIMEOUT, APPLIANCE_READY_TIMEOUT)
+        self.write_scheduler.window = options.get(CONF_STATE_WRITE_DEBOUNCE, STATE_WRITE_DEBOUNCE)
+        try:
+            self.erd_throttle.intervals = parse_erd_throttles(options.get(CONF_ERD_THROTTLES, ""))
+        except ValueError as exc:
+            _LOGGER.error(f'Ignoring ERD throttles: {exc}')
+            self.erd_throttle.intervals = {}
+        # Throttled ERDs change too often to show every change, let alone save it
+        self.snapshot.volatile_erd_codes = VOLATILE_ERD_CODES | set(self.erd_throttle.intervals)
+        self.poll_scheduler.reschedule()
 
     def create_ge_client(self, event_loop: Optional[asyncio.AbstractEventLoop]) -> GeWebsocketClient:
         """
@@ -60,6 +160,10 @@ def create_ge_client(self, event_loop: Optional[asyncio.AbstractEventLoop]) -> G
         client.add_event_handler(EVENT_CONNECTED, self.on_connect)
         return client
 
+    @property
+    def config_entry(self) -> ConfigEntry:
+        return self._config_entry
+
     @property
     def appliances(self) -> Iterable[GeAppliance]:
         return self.client.appliances.values()
@@ -68,16 +172,37 @@ def appliances(self) -> Iterable[GeAppliance]:
     def appliance_apis(self) -> Dict[str, ApplianceApi]:
         return self._appliance_apis
 
+    @property
+    def diagnostics(self) -> Dict[str, Any]:
+        """Runtime statistics, exposed as attributes of the diagnostics sensor."""
+        return {
+            "startup_latency": self.startup_latency,
+            "appliances_timed_out": len(self._timed_out_appliances),
+            "stale_appliances": len(self._stale_appliances),
+            "missing_appliances": len(self._missing_appliances),
+            "connected": self._connected,
+            "background_tasks": len(self.tasks),
+            "reconnects": self.reconnects,
+            "erd_updates_received": self.updates_received,
+            "erd_updates_unchanged": self.updates_unchanged,
+            "erd_updates_throttled": self.erd_throttle.throttled,
+            "circuit_breakers": {
+                api.appliance.mac_addr: api.circuit_breaker.state for api in self.appliance_apis.values()
+            },
+            "writes_rejected": sum(api.circuit_breaker.rejected for api in self.appliance_apis.values()),
+            **self.snapshot.stats,
+            **self.credentials.stats,
+            **self.update_queue.stats,
+            **self.write_scheduler.stats,
+            **self.write_coalescer.stats,
+            **self.outbound_queue.stats,
+            **self.poll_scheduler.stats,
+        }
+
     def _get_appliance_api(self, appliance: GeAppliance) -> ApplianceApi:
         api_type = get_appliance_api_type(appliance.appliance_type)
         return api_type(self, appliance)
 
-    def regenerate_appliance_apis(self):
-        """Regenerate the appliance_apis dictionary, adding elements as necessary."""
-        for jid, appliance in self.client.appliances.keys():
-            if jid not in self._appliance_apis:
-                self._appliance_apis[jid] = self._get_appliance_api(appliance)
-
     def maybe_add_appliance_api(self, appliance: GeAppliance):
         mac_addr = appliance.mac_addr
         if mac_addr not in self.appliance_apis:
@@ -85,6 +210,37 @@ def maybe_add_appliance_api(self, appliance: GeAppliance):
             api = self._get_appliance_api(appliance)
             api.build_entities_list()
             self.appliance_apis[mac_addr] = api
+            self._add_entities(api, api.entities)
+
+    def add_entity_platform(self, async_add_entities: Callable, predicate: EntityPredicate):
+        """
+        Register a platform's async_add_entities callback.
+
+        Entities from appliances we already have are added straight away, and those from each new
+        appliance are added as soon as its API is built.
+
+        :param async_add_entities: The platform's async_add_entities callback
+        :param predicate: Called with an appliance API and one of its entities, returns True if the
+            entity belongs to the platform
+        """
+        platform = (async_add_entities, predicate)
+        self._entity_platforms.append(platform)
+        for api in self.appliance_apis.values():
+            self._add_entities(api, api.entities, [platform])
+
+    def _add_entities(
+            self,
+            api: ApplianceApi,
+            entities: Iterable["GeEntity"],
+            platforms: Optional[Iterable[Tuple[Callable, EntityPredicate]]] = None):
+        """Add an appliance's entities to whichever of the (given) platforms they belong to."""
+        if platforms is None:
+            platforms = self._entity_platforms
+        for async_add_entities, predicate in platforms:
+            platform_entities = [entity for entity in entities if predicate(api, entity)]
+            if platform_entities:
+                _LOGGER.debug(f'Adding {len(platform_entities):d} entities')
+                async_add_entities(platform_entities)
 
     async def get_client(self) -> GeWebsocketClient:
         """Get a new GE Websocket client."""
@@ -98,13 +254,128 @@ async def get_client(self) -> GeWebsocketClient:
     async def async_start_client(self):
         """Start a new GeClient in the HASS event loop."""
         _LOGGER.debug('Running client')
+        if self._start_time is None:
+            self._start_time = self._hass.loop.time()
         client = await self.get_client()
+        if not self._restored:
+            self._restored = True
+            await self.async_restore_snapshot(client)
 
         session = self._hass.helpers.aiohttp_client.async_get_clientsession()
-        await client.async_get_credentials(session)
-        fut = asyncio.ensure_future(client.async_run_client(), loop=self._hass.loop)
+        client.credentials = await self.credentials.async_get_wss_credentials(session)
+        self._client_task = self.tasks.create_task(self._async_run_client(client))
         _LOGGER.debug('Client running')
-        return fut
+        return self._client_task
+
+    async def async_restore_snapshot(self, client: GeWebsocketClient):
+        """
+        Recreate appliances and their APIs from the last known state, so their entities can be added right away.
+
+        Restored appliances are marked stale until live data arrives for them.
+        """
+        for mac_addr, erd_values in (await self.snapshot.async_load()).items():
+            appliance = GeAppliance(mac_addr, client)
+            try:
+                appliance.update_erd_values(erd_values)
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception(f'Could not restore {mac_addr} from snapshot')
+                continue
+            if appliance.appliance_type is None:
+                continue
+            _LOGGER.debug(f'Restoring {mac_addr} from snapshot')
+            appliance.initialized = True
+            appliance.set_available()
+            client.appliances[mac_addr] = appliance
+            self._stale_appliances.add(mac_addr)
+            self._refresh_on_roster.add(mac_addr)
+            self.maybe_add_appliance_api(appliance)
+            self.appliance_apis[mac_addr].stale = True
+            self.poll_scheduler.add(mac_addr)
+
+    async def _async_run_client(self, client: GeWebsocketClient):
+        """
+        Keep the client connected.
+
+        Whenever the connection drops or can't be made, we reconnect the same client after a
+        jittered exponential backoff, so the appliance APIs and entities carry on as they are.
+        """
+        session = self._hass.helpers.aiohttp_client.async_get_clientsession()
+        while True:
+            try:
+                await client.async_run_client()
+            except websockets.InvalidHandshake:
+                _LOGGER.warning('Websocket connection refused, getting new credentials')
+                self.credentials.invalidate()
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as exc:
+                _LOGGER.warning(f'Websocket connection failed: {exc}')
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=broad-except
+                # e.g. an error handling a message, which shouldn't stop us reconnecting
+                _LOGGER.exception('Websocket client failed unexpectedly')
+            self._start_grace_period()
+
+            while True:
+                await self._async_reconnect_delay()
+                try:
+                    client.credentials = await self.credentials.async_get_wss_credentials(session)
+                    break
+                except GeAuthError:
+                    _LOGGER.error('Authentication failed while reconnecting')
+                    self._async_start_reauth()
+                    return
+                except Exception as exc:  # pylint: disable=broad-except
+                    _LOGGER.warning(f'Could not get credentials: {exc}')
+            self.reconnects += 1
+
+    async def _async_reconnect_delay(self):
+        """Wait before the next reconnection attempt, doubling the wait (with jitter) each time."""
+        delay = min(RECONNECT_MIN_DELAY * 2 ** self._reconnect_attempt, RECONNECT_MAX_DELAY)
+        delay = random.uniform(delay / 2, delay)
+        self._reconnect_attempt += 1
+        _LOGGER.info(f'Reconnecting in {delay:.1f}s')
+        await asyncio.sleep(delay)
+
+    async def async_shutdown(self):
+        """
+        Stop the client and everything running in the background.
+
+        gekitchen runs our event handlers with `ensure_future`, outside the task group, so one can
+        still run after we've shut down.  The handlers check `_shutting_down` and return straight
+        away, so that they can't start anything up again.
+        """
+        _LOGGER.debug('Shutting down')
+        self._shutting_down = True
+        if self.remove_update_listener is not None:
+            self.remove_update_listener()
+            self.remove_update_listener = None
+        if self._grace_handle is not None:
+            self._grace_handle.cancel()
+            self._grace_handle = None
+        if self._roster_handle is not None:
+            self._roster_handle.cancel()
+            self._roster_handle = None
+        for deadline in self._ready_deadlines.values():
+            deadline.cancel()
+        self._ready_deadlines.clear()
+        self.poll_scheduler.stop()
+        self.write_scheduler.cancel()
+        self.update_queue.clear()
+        self.credentials.cancel()
+        self.erd_throttle.cancel()
+        self.write_coalescer.cancel()
+        self.outbound_queue.clear()
+        for api in self.appliance_apis.values():
+            api.cancel_writes()
+        await self.tasks.async_cancel()
+
+        client = self.client
+        if client is not None:
+            if client._keepalive_fut is not None:
+                client._keepalive_fut.cancel()
+            websocket = client.websocket
+            if websocket is not None and not websocket.closed:
+                await websocket.close()
 
     async def _kill_client(self):
         """Kill the client.  Leaving this in for testing purposes."""
@@ -113,48 +384,264 @@ async def _kill_client(self):
         await self.client.websocket.close()
 
     async def on_device_update(self, data: Tuple[GeAppliance, Dict[ErdCodeType, Any]]):
-        """Let HA know there's new state."""
+        """Queue new state, to let HA know about it once it's our turn."""
+        if self._shutting_down:
+            return
         self.last_update_success = True
-        appliance, _ = data
+        appliance, updates = data
+        # Don't keep writers waiting behind the queue
+        api = self.appliance_apis.get(appliance.mac_addr)
+        if api is not None:
+            api.acknowledge_writes(updates)
+        self.update_queue.put(appliance, updates)
+
+    def _process_device_update(self, appliance: GeAppliance, updates: Dict[ErdCodeType, Any]):
+        """Let HA know there's new state."""
+        mac_addr = appliance.mac_addr
+        # Full updates (e.g. after a reconnect) mostly repeat what we already have, so only pass on what changed
+        changed = self.snapshot.record(mac_addr, updates)
+        self.updates_received += len(updates)
+        self.updates_unchanged += len(updates) - len(changed)
         try:
-            api = self.appliance_apis[appliance.mac_addr]
+            api = self.appliance_apis[mac_addr]
         except KeyError:
             return
-        for entity in api.entities:
-            _LOGGER.debug(f'Updating {entity} ({entity.unique_id}, {entity.entity_id})')
-            entity.async_write_ha_state()
+        self.poll_scheduler.note_push(mac_addr)
+        new_entities = api.discover_entities(changed)
+        if new_entities:
+            _LOGGER.debug(f'Discovered {len(new_entities):d} new entities for {mac_addr}')
+            self._add_entities(api, new_entities)
+        if mac_addr in self._stale_appliances:
+            # First live data since restoring, so everything may have changed
+            _LOGGER.debug(f'Reconciling {mac_addr} with live data')
+            self._stale_appliances.discard(mac_addr)
+            api.stale = False
+            entities = api.entities
+        else:
+            entities = api.get_entities_for_erd_codes(self.erd_throttle.filter(mac_addr, changed))
+        for entity in entities:
+            self.write_scheduler.schedule(entity)
+
+    def _schedule_erd_entities(self, mac_addr: str, erd_codes: Iterable[ErdCodeType]):
+        """Write the entities that depend on any of the given ERD codes."""
+        try:
+            api = self.appliance_apis[mac_addr]
+        except KeyError:
+            return
+        for entity in api.get_entities_for_erd_codes(erd_codes):
+            self.write_scheduler.schedule(entity)
 
     @property
     def all_appliances_updated(self) -> bool:
         """True if all appliances have had an initial update."""
         return all([a.initialized for a in self.appliances])
 
-    async def on_appliance_list(self, _):
+    @property
+    def all_appliances_ready(self) -> bool:
+        """True once we have the roster and every appliance on it has either initialized or timed out."""
+        return self._got_roster and not self._ready_deadlines
+
+    async def on_appliance_list(self, items: List[Dict[str, Any]]):
         """When we get an appliance list, mark it and maybe trigger all ready."""
+        if self._shutting_down:
+            return
         _LOGGER.debug('Got roster update')
         self.last_update_success = True
+        self._schedule_roster_refresh()
+        roster = {item["applianceId"].upper() for item in items}
+        await self._async_reconcile_roster(roster)
+        if self._refresh_on_roster:
+            await self.async_refresh_known_appliances(items)
         if not self._got_roster:
             self._got_roster = True
-            await asyncio.sleep(5)  # After the initial roster update, wait a bit and hit go
+            # The client adds the roster's appliances before firing this event, so wait on the
+            # ones we haven't heard from yet, but only for so long
+            for mac_addr in self.client.appliances:
+                if mac_addr not in self.appliance_apis:
+                    self._ready_deadlines[mac_addr] = self._hass.loop.call_later(
+                        self.appliance_ready_timeout, self._on_appliance_ready_timeout, mac_addr
+                    )
             await self.async_maybe_trigger_all_ready()
 
+    async def _async_reconcile_roster(self, roster: Set[str]):
+        """
+        Remove appliances that have left the account.
+
+        Removing an appliance also removes its entities and device from the registries, losing
+        any renames or area assignments, and the cloud can send empty or partial rosters.  So an
+        appliance missing from the roster is only shown as unavailable at first, and is only
+        removed once it has been missing from several rosters in a row, over the grace period.
+        """
+        now = self._hass.loop.time()
+        for mac_addr in roster:
+            if self._missing_appliances.pop(mac_addr, None) is not None:
+                _LOGGER.info(f'Appliance {mac_addr} is back on the account')
+                self._refresh_on_roster.add(mac_addr)
+        for mac_addr in list(self.client.appliances):
+            if mac_addr in roster:
+                continue
+            misses, first_missed = self._missing_appliances.get(mac_addr, (0, now))
+            misses += 1
+            if misses >= APPLIANCE_REMOVAL_ROSTERS and now - first_missed >= APPLIANCE_REMOVAL_GRACE_PERIOD:
+                await self.async_remove_appliance(mac_addr)
+                continue
+            if misses == 1:
+                _LOGGER.warning(f'Appliance {mac_addr} is missing from the roster, marking it unavailable')
+            self._missing_appliances[mac_addr] = (misses, first_missed)
+            # Marks it unavailable, and keeps it that way until it's back
+            self._refresh_on_roster.add(mac_addr)
+        self.snapshot.retain(roster.union(self._missing_appliances))
+
+    async def async_remove_appliance(self, mac_addr: str):
+        """Remove an appliance that's no longer on the account, along with its entities and anything we hold for it."""
+        _LOGGER.info(f'Removing appliance {mac_addr}, which is no longer on the account')
+        self.client.appliances.pop(mac_addr, None)
+        self.poll_scheduler.remove(mac_addr)
+        self.update_queue.discard(mac_addr)
+        self.erd_throttle.discard(mac_addr)
+        self.write_coalescer.discard(mac_addr)
+        self.outbound_queue.discard(mac_addr)
+        self._stale_appliances.discard(mac_addr)
+        self._refresh_on_roster.discard(mac_addr)
+        self._missing_appliances.pop(mac_addr, None)
+        self._timed_out_appliances.discard(mac_addr)
+        deadline = self._ready_deadlines.pop(mac_addr, None)
+        if deadline is not None:
+            deadline.cancel()
+        api = self.appliance_apis.pop(mac_addr, None)
+        if api is None:
+            return
+        api.cancel_writes()
+        ent_reg = await entity_registry.async_get_registry(self.hass)
+        for entity in api.entities:
+            self.write_scheduler.discard(entity)
+            if entity.hass is not None:
+                await entity.async_remove()
+            # Otherwise the registry keeps them around, unavailable, forever
+            if entity.entity_id is not None and ent_reg.async_is_registered(entity.entity_id):
+                ent_reg.async_remove(entity.entity_id)
+        try:
+            identifiers = {(DOMAIN, api.serial_number)}
+        except KeyError:
+            # Never got far enough to have a device
+            return
+        dev_reg = await device_registry.async_get_registry(self.hass)
+        device = dev_reg.async_get_device(identifiers, set())
+        if device is not None:
+            dev_reg.async_remove_device(device.id)
+
+    def _schedule_roster_refresh(self):
+        """Ask for the appliance list again later, so we notice appliances being added or removed."""
+        if self._roster_handle is not None:
+            self._roster_handle.cancel()
+        self._roster_handle = self._hass.loop.call_later(
+            ROSTER_REFRESH_INTERVAL, lambda: self.tasks.create_task(self._async_request_roster())
+        )
+
+    async def _async_request_roster(self):
+        self._roster_handle = None
+        if self._connected:
+            _LOGGER.debug('Requesting roster update')
+            await self.outbound_queue.async_send(self.client.get_appliance_list, PRIORITY_HOUSEKEEPING)
+
+    async def async_refresh_known_appliances(self, items: List[Dict[str, Any]]):
+        """
+        Bring appliances we already had (restored from the snapshot, or from before a reconnect) up to date with the roster.
+
+        The client skips appliances it already knows about when processing the roster, so we set
+        their availability and request their full state ourselves.  Appliances missing from the
+        roster are marked unavailable.
+        """
+        online = {item["applianceId"].upper(): item["online"].upper() == "ONLINE" for item in items}
+        mac_addrs, self._refresh_on_roster = self._refresh_on_roster, set()
+        for mac_addr in mac_addrs:
+            try:
+                appliance = self.client.appliances[mac_addr]
+            except KeyError:
+                continue
+            if online.get(mac_addr):
+                appliance.set_available()
+                await self.outbound_queue.async_send(appliance.async_request_update, PRIORITY_REFRESH, mac_addr)
+            else:
+                appliance.set_unavailable()
+            try:
+                entities = self.appliance_apis[mac_addr].entities
+            except KeyError:
+                continue
+            for entity in entities:
+                self.write_scheduler.schedule(entity)
+
+    def _on_appliance_ready_timeout(self, mac_addr: str):
+        """Stop waiting on an appliance that hasn't sent its initial update."""
+        if self._ready_deadlines.pop(mac_addr, None) is None:
+            return
+        _LOGGER.warning(f'Timed out waiting for initial update from {mac_addr}')
+        self._timed_out_appliances.add(mac_addr)
+        self.tasks.create_task(self.async_maybe_trigger_all_ready())
+
     async def on_device_initial_update(self, appliance: GeAppliance):
         """When an appliance first becomes ready, let the system know and schedule periodic updates."""
+        if self._shutting_down:
+            return
         _LOGGER.debug(f'Got initial update for {appliance.mac_addr}')
         self.last_update_success = True
         self.maybe_add_appliance_api(appliance)
+        deadline = self._ready_deadlines.pop(appliance.mac_addr, None)
+        if deadline is not None:
+            deadline.cancel()
+        self._timed_out_appliances.discard(appliance.mac_addr)
+        _LOGGER.debug(f'Scheduling updates for {appliance.mac_addr}')
+        self.poll_scheduler.add(appliance.mac_addr)
         await self.async_maybe_trigger_all_ready()
-        _LOGGER.debug(f'Requesting updates for {appliance.mac_addr}')
-        while not self.client.websocket.closed and appliance.available:
-            await asyncio.sleep(UPDATE_INTERVAL)
-            await appliance.async_request_update()
-        _LOGGER.debug(f'No longer requesting updates for {appliance.mac_addr}')
+
+    def _get_poll_interval(self, mac_addr: str) -> float:
+        try:
+            return self.appliance_apis[mac_addr].poll_interval
+        except KeyError:
+            return self.poll_interval
+
+    async def async_poll_appliance(self, mac_addr: str):
+        """Refresh an appliance's state, if it's reachable."""
+        try:
+            api = self.appliance_apis[mac_addr]
+        except KeyError:
+            self.poll_scheduler.remove(mac_addr)
+            return
+        websocket = self.client.websocket
+        if websocket is None or websocket.closed or not api.appliance.available:
+            return
+        _LOGGER.debug(f'Requesting update for {mac_addr}')
+        await api.async_request_refresh()
 
     async def on_disconnect(self, _):
-        """Handle disconnection."""
-        _LOGGER.debug("Disconnected. Attempting to reconnect.")
+        """Handle disconnection.  The client is reconnected by `_async_run_client`."""
         self.last_update_success = False
-
+        self._connected = False
+        if self._shutting_down:
+            return
+        _LOGGER.debug("Disconnected. Attempting to reconnect.")
+        # The client won't request updates for appliances it already knows about when it gets the roster
+        self._refresh_on_roster.update(self.client.appliances)
+        self._start_grace_period()
+
+    def _start_grace_period(self):
+        """Mark everything unavailable if we haven't reconnected within the grace period."""
+        if self._grace_handle is None and not self._connected:
+            self._grace_handle = self._hass.loop.call_later(RECONNECT_GRACE_PERIOD, self._on_grace_period_expired)
+
+    def _on_grace_period_expired(self):
+        self._grace_handle = None
+        if self._connected:
+            return
+        _LOGGER.warning(f'Still disconnected after {RECONNECT_GRACE_PERIOD}s, marking appliances unavailable')
+        for mac_addr, api in self.appliance_apis.items():
+            api.appliance.set_unavailable()
+            self._refresh_on_roster.add(mac_addr)
+            for entity in api.entities:
+                self.write_scheduler.schedule(entity)
+
+    def _async_start_reauth(self):
+        """Start a reauth flow, unless there's one in progress already."""
         flow_context = {
             "source": "reauth",
             "unique_id": self._config_entry.unique_id,
@@ -175,17 +662,26 @@ async def on_disconnect(self, _):
 
     async def on_connect(self, _):
         """Set state upon connection."""
+        if self._shutting_down:
+            return
         self.last_update_success = True
+        self._connected = True
+        self._reconnect_attempt = 0
+        if self._grace_handle is not None:
+            self._grace_handle.cancel()
+            self._grace_handle = None
 
     async def async_maybe_trigger_all_ready(self):
         """See if we're all ready to go, and if so, let the games begin."""
-        if self._init_done or self.initialization_future.done():
+        if self.initialization_future.done():
             # Been here, done this
             return
-        if self._got_roster and self.all_appliances_updated:
-            _LOGGER.debug('Ready to go.  Waiting 2 seconds and setting init future result.')
-            # The the flag and wait to prevent two different fun race conditions
-            self._init_done = True
-            await asyncio.sleep(2)
+        if self.all_appliances_ready:
+            if self._start_time is not None:
+                self.startup_latency = round(self._hass.loop.time() - self._start_time, 3)
+            _LOGGER.info(
+                f'Ready to go after {self.startup_latency}s '
+                f'({len(self.appliance_apis)} appliances ready, {len(self._timed_out_appliances)} timed out)'
+            )
             self.initialization_future.set_result(True)
             await self.client.async_event(EVENT_ALL_APPLIANCES_READY, None)
@@ -0,0 +1,121 @@
+"""Bounded, coalescing queue between the gekitchen client and the entity layer."""
+
+import asyncio
+from collections import deque
+import logging
+from typing import Any, Callable, Coroutine, Deque, Dict, Optional
+
+from gekitchen import ErdCodeType, GeAppliance
+
+from homeassistant.core import HomeAssistant
+
+from .const import INBOUND_QUEUE_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class InboundUpdateQueue:
+    """
+    Queue ERD updates per appliance and process them fairly.
+
+    The client has already applied each update to its appliance by the time we see it, so the
+    updates only tell us what to refresh.  That means that once an appliance's queue is full, we
+    can safely merge new updates into the last queued one, keeping only the latest value for each
+    ERD.  A single consumer works through the appliances round robin, one update at a time, so a
+    chatty appliance can't hold up the rest.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            process: Callable[[GeAppliance, Dict[ErdCodeType, str]], None],
+            maxlen: int = INBOUND_QUEUE_SIZE,
+            create_task: Optional[Callable[[Coroutine], Any]] = None):
+        """
+        :param hass: HomeAssistant instance
+        :param process: Called with an appliance and a batch of raw ERD updates for it
+        :param maxlen: Number of updates to queue per appliance before coalescing
+        :param create_task: Function used to start the consumer, defaults to `hass.async_create_task`
+        """
+        self._hass = hass
+        self._create_task = create_task or hass.async_create_task
+        self._process = process
+        self.maxlen = maxlen
+        self._appliances = {}  # type: Dict[str, GeAppliance]
+        self._queues = {}  # type: Dict[str, Deque[Dict[ErdCodeType, str]]]
+        self._ready = deque()  # type: Deque[str]
+        self._consumer = None  # type: Optional[asyncio.Task]
+        self.queued = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of updates waiting to be processed."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "inbound_queue_depth": self.depth,
+            "inbound_updates_queued": self.queued,
+            "inbound_updates_coalesced": self.coalesced,
+            "inbound_values_dropped": self.dropped,
+        }
+
+    def put(self, appliance: GeAppliance, updates: Dict[ErdCodeType, str]):
+        """Queue a batch of raw ERD updates for an appliance."""
+        mac_addr = appliance.mac_addr
+        self._appliances[mac_addr] = appliance
+        try:
+            queue = self._queues[mac_addr]
+        except KeyError:
+            queue = self._queues[mac_addr] = deque()
+        if not queue:
+            self._ready.append(mac_addr)
+        if len(queue) < self.maxlen:
+            self.queued += 1
+            queue.append(dict(updates))
+        else:
+            # Under pressure, so fold this into the last update, superseding any older values
+            self.coalesced += 1
+            last = queue[-1]
+            self.dropped += sum(1 for erd_code in updates if erd_code in last)
+            last.update(updates)
+        if self._consumer is None:
+            self._consumer = self._create_task(self._async_consume())
+
+    def discard(self, mac_addr: str):
+        """Drop everything queued for an appliance."""
+        self._queues.pop(mac_addr, None)
+        self._appliances.pop(mac_addr, None)
+        try:
+            self._ready.remove(mac_addr)
+        except ValueError:
+            pass
+
+    def clear(self):
+        """Drop everything queued and stop the consumer."""
+        self._queues.clear()
+        self._ready.clear()
+        self._appliances.clear()
+        if self._consumer is not None:
+            self._consumer.cancel()
+            self._consumer = None
+
+    async def _async_consume(self):
+        try:
+            while self._ready:
+                mac_addr = self._ready.popleft()
+                queue = self._queues[mac_addr]
+                updates = queue.popleft()
+                if queue:
+                    self._ready.append(mac_addr)
+                try:
+                    self._process(self._appliances[mac_addr], updates)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception(f'Error processing update for {mac_addr}')
+                # Let the client (and everything else) have a turn
+                await asyncio.sleep(0)
+        finally:
+            self._consumer = None
@@ -1,6 +1,5 @@
 """GE Kitchen Sensor Entities"""
 import abc
-import async_timeout
 from datetime import timedelta
 import logging
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
@@ -8,6 +7,7 @@
 from bidict import bidict
 from gekitchen import (
     ErdCode,
+    ErdCodeType,
     ErdDoorStatus,
     ErdFilterStatus,
     ErdFullNotFull,
@@ -39,7 +39,7 @@
 from homeassistant.const import ATTR_TEMPERATURE, TEMP_CELSIUS, TEMP_FAHRENHEIT
 from homeassistant.core import HomeAssistant
 
-from .entities import GeEntity, stringify_erd_value
+from .entities import GeEntity, rendered_property, stringify_erd_value
 from .const import DOMAIN
 
 if TYPE_CHECKING:
@@ -78,11 +78,38 @@
     ErdOvenCookMode.CONVROAST_NOOPTION: OP_MODE_CONVROAST,
     ErdOvenCookMode.BAKE_NOOPTION: OP_MODE_BAKE,
 })
+# Skip the trip through ErdOvenCookMode when reading the current operation
+OVEN_COOK_MODE_OP_MAP = {
+    OVEN_COOK_MODE_MAP[erd_cook_mode]: op_mode for erd_cook_mode, op_mode in COOK_MODE_OP_MAP.items()
+}  # type: Dict[OvenCookMode, str]
+
+OVEN_CAVITY_ERD_SUFFIXES = (
+    "AVAILABLE_COOK_MODES",
+    "COOK_MODE",
+    "COOK_TIME_REMAINING",
+    "CURRENT_STATE",
+    "DELAY_TIME_REMAINING",
+    "DISPLAY_TEMPERATURE",
+    "ELAPSED_COOK_TIME",
+    "KITCHEN_TIMER",
+    "PROBE_DISPLAY_TEMP",
+    "PROBE_PRESENT",
+    "RAW_TEMPERATURE",
+)
+OVEN_CAVITY_ERD_CODES = {
+    oven_select: {suffix: ErdCode[f"{oven_select}_{suffix}"] for suffix in OVEN_CAVITY_ERD_SUFFIXES}
+    for oven_select in (UPPER_OVEN, LOWER_OVEN)
+}  # type: Dict[str, Dict[str, ErdCode]]
 
 
 class GeAbstractFridgeEntity(GeEntity, WaterHeaterEntity, metaclass=abc.ABCMeta):
     """Mock a fridge or freezer as a water heater."""
 
+    def __init__(self, api: "ApplianceApi"):
+        super().__init__(api)
+        self._unique_id = f"{self.serial_number}-{self.heater_type}"
+        self._name = f"GE {self.heater_type.title()} {self.serial_number}"
+
     @property
     def heater_type(self) -> str:
         raise NotImplementedError
@@ -95,21 +122,27 @@ def turbo_erd_code(self) -> str:
     def turbo_mode(self) -> str:
         raise NotImplementedError
 
-    @property
+    @rendered_property
     def operation_list(self) -> List[str]:
         return [OP_MODE_NORMAL, OP_MODE_SABBATH, self.turbo_mode]
 
     @property
-    def unique_id(self) -> str:
-        return f"{self.serial_number}-{self.heater_type}"
-
-    @property
-    def name(self) -> Optional[str]:
-        return f"GE {self.heater_type.title()} {self.serial_number}"
+    def erd_codes(self) -> Set[ErdCode]:
+        return {
+            ErdCode.CURRENT_TEMPERATURE,
+            ErdCode.DOOR_STATUS,
+            ErdCode.ICE_MAKER_BUCKET_STATUS,
+            ErdCode.ICE_MAKER_CONTROL,
+            ErdCode.SABBATH_MODE,
+            ErdCode.SETPOINT_LIMITS,
+            ErdCode.TEMPERATURE_SETTING,
+            ErdCode.TEMPERATURE_UNIT,
+            self.turbo_erd_code,
+        }
 
-    @property
+    @rendered_property
     def temperature_unit(self):
-        measurement_system = self.appliance.get_erd_value(ErdCode.TEMPERATURE_UNIT)
+        measurement_system = self.api.get_erd_value(ErdCode.TEMPERATURE_UNIT)
         if measurement_system == ErdMeasurementUnits.METRIC:
             return TEMP_CELSIUS
         return TEMP_FAHRENHEIT
@@ -117,17 +150,17 @@ def temperature_unit(self):
     @property
     def target_temps(self) -> FridgeSetPoints:
         """Get the current temperature settings tuple."""
-        return self.appliance.get_erd_value(ErdCode.TEMPERATURE_SETTING)
+        return self.api.get_erd_value(ErdCode.TEMPERATURE_SETTING)
 
-    @property
+    @rendered_property
     def target_temperature(self) -> int:
         """Return the temperature we try to reach."""
         return getattr(self.target_temps, self.heater_type)
 
-    @property
+    @rendered_property
     def current_temperature(self) -> int:
         """Return the current temperature."""
-        current_temps = self.appliance.get_erd_value(ErdCode.CURRENT_TEMPERATURE)
+        current_temps = self.api.get_erd_value(ErdCode.CURRENT_TEMPERATURE)
         current_temp = getattr(current_temps, self.heater_type)
         if current_temp is None:
             _LOGGER.exception(f"{self.name} has None for current_temperature (available: {self.available})!")
@@ -137,17 +170,17 @@ async def async_set_temperature(self, **kwargs):
         target_temp = kwargs.get(ATTR_TEMPERATURE)
         if target_temp is None:
             return
-        if not self.min_temp <= target_temp <= self.max_temp:
+        if not self.get_live_value("min_temp") <= target_temp <= self.get_live_value("max_temp"):
             raise ValueError("Tried to set temperature out of device range")
 
-        if self.heater_type == HEATER_TYPE_FRIDGE:
-            new_temp = FridgeSetPoints(fridge=target_temp, freezer=self.target_temps.freezer)
-        elif self.heater_type == HEATER_TYPE_FREEZER:
-            new_temp = FridgeSetPoints(fridge=self.target_temps.fridge, freezer=target_temp)
-        else:
+        if self.heater_type not in (HEATER_TYPE_FRIDGE, HEATER_TYPE_FREEZER):
             raise ValueError("Invalid heater_type")
 
-        await self.appliance.async_set_erd_value(ErdCode.TEMPERATURE_SETTING, new_temp)
+        # Only replace our half, so fridge and freezer changes made together merge into one write
+        await self.async_coalesce_erd_value(
+            ErdCode.TEMPERATURE_SETTING,
+            lambda set_points: set_points._replace(**{self.heater_type: target_temp}),
+        )
 
     @property
     def supported_features(self):
@@ -155,60 +188,65 @@ def supported_features(self):
 
     @property
     def setpoint_limits(self) -> FridgeSetPointLimits:
-        return self.appliance.get_erd_value(ErdCode.SETPOINT_LIMITS)
+        return self.api.get_erd_value(ErdCode.SETPOINT_LIMITS)
 
-    @property
+    @rendered_property
     def min_temp(self):
         """Return the minimum temperature."""
         return getattr(self.setpoint_limits, f"{self.heater_type}_min")
 
-    @property
+    @rendered_property
     def max_temp(self):
         """Return the maximum temperature."""
         return getattr(self.setpoint_limits, f"{self.heater_type}_max")
 
-    @property
+    @rendered_property
     def current_operation(self) -> str:
         """Get ther current operation mode."""
-        if self.appliance.get_erd_value(ErdCode.SABBATH_MODE):
+        if self.api.get_erd_value(ErdCode.SABBATH_MODE):
             return OP_MODE_SABBATH
-        if self.appliance.get_erd_value(self.turbo_erd_code):
+        if self.api.get_erd_value(self.turbo_erd_code):
             return self.turbo_mode
         return OP_MODE_NORMAL
 
     async def async_set_sabbath_mode(self, sabbath_on: bool = True):
         """Set sabbath mode if it's changed"""
-        if self.appliance.get_erd_value(ErdCode.SABBATH_MODE) == sabbath_on:
-            return
-        await self.appliance.async_set_erd_value(ErdCode.SABBATH_MODE, sabbath_on)
+        await self.async_set_erd_values(self._sabbath_mode_changes(sabbath_on))
+
+    def _sabbath_mode_changes(self, sabbath_on: bool) -> Dict[ErdCodeType, Any]:
+        if self.api.get_erd_value(ErdCode.SABBATH_MODE) == sabbath_on:
+            return {}
+        return {ErdCode.SABBATH_MODE: sabbath_on}
 
     async def async_set_operation_mode(self, operation_mode):
         """Set the operation mode."""
-        if operation_mode not in self.operation_list:
+        if operation_mode not in self.get_live_value("operation_list"):
             raise ValueError("Invalid operation mode")
-        if operation_mode == self.current_operation:
+        if operation_mode == self.get_live_value("current_operation"):
             return
         sabbath_mode = operation_mode == OP_MODE_SABBATH
-        await self.async_set_sabbath_mode(sabbath_mode)
+        # Sabbath mode and turbo go out together
+        changes = self._sabbath_mode_changes(sabbath_mode)
         if not sabbath_mode:
-            await self.appliance.async_set_erd_value(self.turbo_erd_code, operation_mode == self.turbo_mode)
+            changes[self.turbo_erd_code] = operation_mode == self.turbo_mode
+        await self.async_set_erd_values(changes)
 
     @property
     def door_status(self) -> FridgeDoorStatus:
         """Shorthand to get door status."""
-        return self.appliance.get_erd_value(ErdCode.DOOR_STATUS)
+        return self.api.get_erd_value(ErdCode.DOOR_STATUS)
 
     @property
     def ice_maker_state_attrs(self) -> Dict[str, Any]:
         """Get state attributes for the ice maker, if applicable."""
         data = {}
 
-        erd_val: FridgeIceBucketStatus = self.appliance.get_erd_value(ErdCode.ICE_MAKER_BUCKET_STATUS)
+        erd_val: FridgeIceBucketStatus = self.api.get_erd_value(ErdCode.ICE_MAKER_BUCKET_STATUS)
         ice_bucket_status = getattr(erd_val, f"state_full_{self.heater_type}")
         if ice_bucket_status != ErdFullNotFull.NA:
             data["ice_bucket"] = ice_bucket_status.name.replace("_", " ").title()
 
-        erd_val: IceMakerControlStatus = self.appliance.get_erd_value(ErdCode.ICE_MAKER_CONTROL)
+        erd_val: IceMakerControlStatus = self.api.get_erd_value(ErdCode.ICE_MAKER_CONTROL)
         ice_control_status = getattr(erd_val, f"status_{self.heater_type}")
         if ice_control_status != ErdOnOff.NA:
             data["ice_maker"] = ice_control_status.name.replace("_", " ").lower()
@@ -225,7 +263,7 @@ def other_state_attrs(self) -> Dict[str, Any]:
         """State attributes to be optionally overridden in subclasses."""
         return {}
 
-    @property
+    @rendered_property
     def device_state_attributes(self) -> Dict[str, Any]:
         door_attrs = self.door_state_attrs
         ice_maker_attrs = self.ice_maker_state_attrs
@@ -239,7 +277,7 @@ class GeFridgeEntity(GeAbstractFridgeEntity):
     turbo_mode = OP_MODE_TURBO_COOL
     icon = "mdi:fridge-bottom"
 
-    @property
+    @rendered_property
     def available(self) -> bool:
         available = super().available
         if not available:
@@ -247,10 +285,14 @@ def available(self) -> bool:
             _LOGGER.critical(f"{self.name} unavailable. Appliance info: Availaible - {app._available} and Init - {app.initialized}")
         return available
 
+    @property
+    def erd_codes(self) -> Set[ErdCode]:
+        return super().erd_codes | {ErdCode.WATER_FILTER_STATUS}
+
     @property
     def other_state_attrs(self) -> Dict[str, Any]:
         """Water filter state."""
-        filter_status: ErdFilterStatus = self.appliance.get_erd_value(ErdCode.WATER_FILTER_STATUS)
+        filter_status: ErdFilterStatus = self.api.get_erd_value(ErdCode.WATER_FILTER_STATUS)
         if filter_status == ErdFilterStatus.NA:
             return {}
         return {"water_filter_status": filter_status.name.replace("_", " ").title()}
@@ -303,25 +345,24 @@ class GeFridgeWaterHeater(GeEntity, WaterHeaterEntity):
     min_temp = 90
     max_temp = 185
 
-    @property
-    def hot_water_status(self) -> HotWaterStatus:
-        """Access the main status value conveniently."""
-        return self.appliance.get_erd_value(ErdCode.HOT_WATER_STATUS)
+    def __init__(self, api: "ApplianceApi"):
+        super().__init__(api)
+        self._unique_id = f"{self.serial_number}-fridge-hot-water"
+        self._name = f"GE Fridge Water Heater {self.serial_number}"
 
     @property
-    def unique_id(self) -> str:
-        """Make a unique id."""
-        return f"{self.serial_number}-fridge-hot-water"
+    def erd_codes(self) -> Set[ErdCode]:
+        return {ErdCode.HOT_WATER_STATUS, ErdCode.SABBATH_MODE, ErdCode.TEMPERATURE_UNIT}
 
     @property
-    def name(self) -> Optional[str]:
-        """Name it reasonably."""
-        return f"GE Fridge Water Heater {self.serial_number}"
+    def hot_water_status(self) -> HotWaterStatus:
+        """Access the main status value conveniently."""
+        return self.api.get_erd_value(ErdCode.HOT_WATER_STATUS)
 
-    @property
+    @rendered_property
     def temperature_unit(self):
         """Select the appropriate temperature unit."""
-        measurement_system = self.appliance.get_erd_value(ErdCode.TEMPERATURE_UNIT)
+        measurement_system = self.api.get_erd_value(ErdCode.TEMPERATURE_UNIT)
         if measurement_system == ErdMeasurementUnits.METRIC:
             return TEMP_CELSIUS
         return TEMP_FAHRENHEIT
@@ -332,7 +373,7 @@ def supports_k_cups(self) -> bool:
         status = self.hot_water_status
         return status.pod_status != ErdPodStatus.NA and status.brew_module != ErdPresent.NA
 
-    @property
+    @rendered_property
     def operation_list(self) -> List[str]:
         """Supported Operations List"""
         ops_list = [OP_MODE_NORMAL, OP_MODE_SABBATH]
@@ -350,14 +391,14 @@ async def async_set_operation_mode(self, operation_mode):
     def supported_features(self):
         pass
 
-    @property
+    @rendered_property
     def current_operation(self) -> str:
         """Get the current operation mode."""
-        if self.appliance.get_erd_value(ErdCode.SABBATH_MODE):
+        if self.api.get_erd_value(ErdCode.SABBATH_MODE):
             return OP_MODE_SABBATH
         return OP_MODE_NORMAL
 
-    @property
+    @rendered_property
     def current_temperature(self) -> Optional[int]:
         """Return the current temperature."""
         return self.hot_water_status.current_temp
@@ -374,28 +415,24 @@ def __init__(self, api: "ApplianceApi", oven_select: str = UPPER_OVEN, two_cavit
 
         self._oven_select = oven_select
         self._two_cavity = two_cavity
+        self._cavity_erd_codes = OVEN_CAVITY_ERD_CODES[oven_select]
+        # (available cook modes, operation list built from them)
+        self._operation_list = (None, [OP_MODE_OFF])  # type: Tuple[Optional[Set[ErdOvenCookMode]], List[str]]
         super().__init__(api)
+        if two_cavity:
+            oven_title = oven_select.replace("_", " ").title()
+        else:
+            oven_title = "Oven"
+        self._unique_id = f"{self.serial_number}-{oven_select.lower()}"
+        self._name = f"GE {oven_title}"
 
     @property
     def supported_features(self):
         return GE_FRIDGE_SUPPORT
 
-    @property
-    def unique_id(self) -> str:
-        return f"{self.serial_number}-{self.oven_select.lower()}"
-
-    @property
-    def name(self) -> Optional[str]:
-        if self._two_cavity:
-            oven_title = self.oven_select.replace("_", " ").title()
-        else:
-            oven_title = "Oven"
-
-        return f"GE {oven_title}"
-
-    @property
+    @rendered_property
     def temperature_unit(self):
-        measurement_system = self.appliance.get_erd_value(ErdCode.TEMPERATURE_UNIT)
+        measurement_system = self.api.get_erd_value(ErdCode.TEMPERATURE_UNIT)
         if measurement_system == ErdMeasurementUnits.METRIC:
             return TEMP_CELSIUS
         return TEMP_FAHRENHEIT
@@ -404,44 +441,51 @@ def temperature_unit(self):
     def oven_select(self) -> str:
         return self._oven_select
 
+    @property
+    def erd_codes(self) -> Set[ErdCode]:
+        cavity_codes = set(self._cavity_erd_codes.values())
+        return cavity_codes | {ErdCode.OVEN_MODE_MIN_MAX_TEMP, ErdCode.TEMPERATURE_UNIT}
+
     def get_erd_code(self, suffix: str) -> ErdCode:
         """Return the appropriate ERD code for this oven_select"""
-        return ErdCode[f"{self.oven_select}_{suffix}"]
+        return self._cavity_erd_codes[suffix]
 
-    @property
+    @rendered_property
     def current_temperature(self) -> Optional[int]:
         current_temp = self.get_erd_value("DISPLAY_TEMPERATURE")
         if current_temp:
             return current_temp
         return self.get_erd_value("RAW_TEMPERATURE")
 
-    @property
+    @rendered_property
     def current_operation(self) -> Optional[str]:
-        cook_setting = self.current_cook_setting
-        cook_mode = cook_setting.cook_mode
-        # TODO: simplify this lookup nonsense somehow
-        current_state = OVEN_COOK_MODE_MAP.inverse[cook_mode]
+        cook_mode = self.current_cook_setting.cook_mode
         try:
-            return COOK_MODE_OP_MAP[current_state]
+            return OVEN_COOK_MODE_OP_MAP[cook_mode]
         except KeyError:
-            _LOGGER.debug(f"Unable to map {current_state} to an operation mode")
+            _LOGGER.debug(f"Unable to map {cook_mode} to an operation mode")
             return OP_MODE_COOK_UNK
 
-    @property
+    @rendered_property
     def operation_list(self) -> List[str]:
-        erd_code = self.get_erd_code("AVAILABLE_COOK_MODES")
-        cook_modes: Set[ErdOvenCookMode] = self.appliance.get_erd_value(erd_code)
-        op_modes = [o for o in (COOK_MODE_OP_MAP[c] for c in cook_modes) if o]
+        erd_code = self._cavity_erd_codes["AVAILABLE_COOK_MODES"]
+        cook_modes: Set[ErdOvenCookMode] = self.api.get_erd_value(erd_code)
+        cached_modes, op_modes = self._operation_list
+        # gekitchen stores a new set on every refresh, so fall back to comparing contents
+        if cook_modes is cached_modes or cook_modes == cached_modes:
+            return op_modes
+        op_modes = [o for o in (COOK_MODE_OP_MAP.get(c) for c in cook_modes) if o]
         op_modes = [OP_MODE_OFF] + op_modes
+        self._operation_list = (cook_modes, op_modes)
         return op_modes
 
     @property
     def current_cook_setting(self) -> OvenCookSetting:
         """Get the current cook mode."""
         erd_code = self.get_erd_code("COOK_MODE")
-        return self.appliance.get_erd_value(erd_code)
+        return self.api.get_erd_value(erd_code)
 
-    @property
+    @rendered_property
     def target_temperature(self) -> Optional[int]:
         """Return the temperature we try to reach."""
         cook_mode = self.current_cook_setting
@@ -449,16 +493,16 @@ def target_temperature(self) -> Optional[int]:
             return cook_mode.temperature
         return None
 
-    @property
+    @rendered_property
     def min_temp(self) -> int:
         """Return the minimum temperature."""
-        min_temp, _ = self.appliance.get_erd_value(ErdCode.OVEN_MODE_MIN_MAX_TEMP)
+        min_temp, _ = self.api.get_erd_value(ErdCode.OVEN_MODE_MIN_MAX_TEMP)
         return min_temp
 
-    @property
+    @rendered_property
     def max_temp(self) -> int:
         """Return the maximum temperature."""
-        _, max_temp = self.appliance.get_erd_value(ErdCode.OVEN_MODE_MIN_MAX_TEMP)
+        _, max_temp = self.api.get_erd_value(ErdCode.OVEN_MODE_MIN_MAX_TEMP)
         return max_temp
 
     async def async_set_operation_mode(self, operation_mode: str):
@@ -467,18 +511,20 @@ async def async_set_operation_mode(self, operation_mode: str):
         erd_cook_mode = COOK_MODE_OP_MAP.inverse[operation_mode]
         # Pick a temperature to set.  If there's not one already set, default to
         # good old 350F.
+        current_target_temp = self.get_live_value("target_temperature")
         if operation_mode == OP_MODE_OFF:
             target_temp = 0
-        elif self.target_temperature:
-            target_temp = self.target_temperature
-        elif self.temperature_unit == TEMP_FAHRENHEIT:
+        elif current_target_temp:
+            target_temp = current_target_temp
+        elif self.get_live_value("temperature_unit") == TEMP_FAHRENHEIT:
             target_temp = 350
         else:
             target_temp = 177
 
         new_cook_mode = OvenCookSetting(OVEN_COOK_MODE_MAP[erd_cook_mode], target_temp)
         erd_code = self.get_erd_code("COOK_MODE")
-        await self.appliance.async_set_erd_value(erd_code, new_cook_mode)
+        # Goes through the coalescer too, so it supersedes any temperature change still waiting to go out
+        await self.async_coalesce_erd_value(erd_code, lambda _: new_cook_mode, immediate=True)
 
     async def async_set_temperature(self, **kwargs):
         """Set the cook temperature"""
@@ -486,7 +532,7 @@ async def async_set_temperature(self, **kwargs):
         if target_temp is None:
             return
 
-        current_op = self.current_operation
+        current_op = self.get_live_value("current_operation")
         if current_op != OP_MODE_OFF:
             erd_cook_mode = COOK_MODE_OP_MAP.inverse[current_op]
         else:
@@ -494,19 +540,19 @@ async def async_set_temperature(self, **kwargs):
 
         new_cook_mode = OvenCookSetting(OVEN_COOK_MODE_MAP[erd_cook_mode], target_temp)
         erd_code = self.get_erd_code("COOK_MODE")
-        await self.appliance.async_set_erd_value(erd_code, new_cook_mode)
+        await self.async_coalesce_erd_value(erd_code, lambda _: new_cook_mode)
 
     def get_erd_value(self, suffix: str) -> Any:
         erd_code = self.get_erd_code(suffix)
-        return self.appliance.get_erd_value(erd_code)
+        return self.api.get_erd_value(erd_code)
 
     @property
     def display_state(self) -> Optional[str]:
         erd_code = self.get_erd_code("CURRENT_STATE")
-        erd_value = self.appliance.get_erd_value(erd_code)
+        erd_value = self.api.get_erd_value(erd_code)
         return stringify_erd_value(erd_code, erd_value, self.temperature_unit)
 
-    @property
+    @rendered_property
     def device_state_attributes(self) -> Optional[Dict[str, Any]]:
         probe_present = self.get_erd_value("PROBE_PRESENT")
         data = {
@@ -535,17 +581,4 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry, asyn
     """GE Kitchen sensors."""
     _LOGGER.debug('Adding GE "Water Heaters"')
     coordinator: "GeKitchenUpdateCoordinator" = hass.data[DOMAIN][config_entry.entry_id]
-
-    # This should be a NOP, but let's be safe
-    with async_timeout.timeout(20):
-        await coordinator.initialization_future
-    _LOGGER.debug('Coordinator init future finished')
-
-    apis = list(coordinator.appliance_apis.values())
-    _LOGGER.debug(f'Found {len(apis):d} appliance APIs')
-    entities = [
-        entity for api in apis for entity in api.entities
-        if isinstance(entity, WaterHeaterEntity)
-    ]
-    _LOGGER.debug(f'Found {len(entities):d} "water heaters"')
-    async_add_entities(entities)
+    coordinator.add_entity_platform(async_add_entities, lambda api, entity: isinstance(entity, WaterHeaterEntity))
@@ -0,0 +1,193 @@
+"""Last-writer-wins coalescing of outbound ERD writes."""
+
+import asyncio
+import logging
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from gekitchen import ErdCodeType, translate_erd_code
+
+from homeassistant.core import HomeAssistant
+
+from .const import ERD_WRITE_DEBOUNCE
+
+if TYPE_CHECKING:
+    from .appliance_api import ApplianceApi
+
+_LOGGER = logging.getLogger(__name__)
+
+_NO_VALUE = object()
+
+
+class _PendingWrite:
+    """Everything in progress for one ERD on one appliance."""
+    __slots__ = ("api", "value", "waiters", "handle", "task", "sent_value", "sent_waiters")
+
+    def __init__(self, api: "ApplianceApi"):
+        self.api = api
+        self.value = _NO_VALUE  # Latest value that hasn't been sent yet
+        self.waiters = []  # type: List[asyncio.Future]
+        self.handle = None  # type: Optional[asyncio.TimerHandle]
+        self.task = None  # type: Optional[asyncio.Future]
+        self.sent_value = _NO_VALUE  # Value sent by the write in flight
+        self.sent_waiters = []  # type: List[asyncio.Future]
+
+    @property
+    def idle(self) -> bool:
+        return self.value is _NO_VALUE and self.task is None
+
+
+class ErdWriteCoalescer:
+    """
+    Collapse rapid writes to the same ERD on the same appliance into a single write of the final value.
+
+    Each write is a function of the latest value, i.e. whatever is waiting to be sent, otherwise
+    whatever is in flight, otherwise the value the appliance shows.  Entities show a value as
+    soon as it's requested, so rapid changes still look instantaneous.  That way writes that each
+    change part of a value (like the fridge and freezer halves of the setpoints) merge rather than
+    overwriting each other with stale state.  Writes are held back until the ERD has been quiet
+    for the debounce window.  If a previous write is still waiting on its acknowledgement by then,
+    we stop waiting on it, since it's been superseded, and everyone waiting on either one gets the
+    result of the new write.
+    """
+
+    def __init__(
+            self,
+            hass: HomeAssistant,
+            window: float = ERD_WRITE_DEBOUNCE,
+            create_task: Optional[Callable[[Coroutine], Any]] = None):
+        """
+        :param hass: HomeAssistant instance
+        :param window: Seconds an ERD has to go without writes before we send the latest value
+        :param create_task: Function used to send writes, defaults to `hass.async_create_task`
+        """
+        self._hass = hass
+        self._create_task = create_task or hass.async_create_task
+        self.window = window
+        self._writes = {}  # type: Dict[Tuple[str, ErdCodeType], _PendingWrite]
+        self.writes_requested = 0
+        self.writes_sent = 0
+        self.writes_superseded = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of ERDs with a write waiting to be sent."""
+        return sum(1 for write in self._writes.values() if write.value is not _NO_VALUE)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "erd_writes_requested": self.writes_requested,
+            "erd_writes_sent": self.writes_sent,
+            "erd_writes_coalesced": self.writes_requested - self.writes_sent - self.pending,
+            "erd_writes_superseded": self.writes_superseded,
+        }
+
+    async def async_set_erd_value(
+            self,
+            api: "ApplianceApi",
+            erd_code: ErdCodeType,
+            update: Callable[[Any], Any],
+            immediate: bool = False) -> Optional[Exception]:
+        """
+        Write a new value for an ERD, coalescing it with any other writes to it.
+
+        :param api: The appliance to write to
+        :param erd_code: The ERD code to write
+        :param update: Called with the latest value of the ERD to get the value to write
+        :param immediate: Send now rather than waiting out the debounce window
+        :return: None if the write that carried this value was acknowledged, otherwise why not
+        :raises ApplianceUnavailable: if the appliance's circuit breaker is rejecting writes
+        """
+        # Fail fast rather than after the debounce window
+        api.circuit_breaker.check(api.appliance.available, probe=False)
+        erd_code = translate_erd_code(erd_code)
+        key = (api.appliance.mac_addr, erd_code)
+        write = self._writes.get(key)
+        if write is None or write.api is not api:
+            write = self._writes[key] = _PendingWrite(api)
+        if write.value is not _NO_VALUE:
+            latest = write.value
+        elif write.sent_value is not _NO_VALUE:
+            latest = write.sent_value
+        else:
+            latest = api.get_erd_value(erd_code)
+        write.value = update(latest)
+        api.overlay_erd_value(erd_code, write.value, write)
+        self.writes_requested += 1
+
+        waiter = self._hass.loop.create_future()
+        write.waiters.append(waiter)
+        if write.handle is not None:
+            write.handle.cancel()
+            write.handle = None
+        if immediate:
+            self._flush(key)
+        else:
+            write.handle = self._hass.loop.call_later(self.window, self._flush, key)
+        return await waiter
+
+    def _flush(self, key: Tuple[str, ErdCodeType]):
+        write = self._writes[key]
+        write.handle = None
+        waiters = write.waiters
+        if write.task is not None:
+            _LOGGER.debug(f'Superseding write of {key[1]} to {key[0]}')
+            self.writes_superseded += 1
+            write.task.cancel()
+            waiters = write.sent_waiters + waiters
+        write.sent_value, write.value = write.value, _NO_VALUE
+        write.sent_waiters, write.waiters = waiters, []
+        self.writes_sent += 1
+        write.task = self._create_task(self._async_send(key, write, write.sent_value, waiters))
+        if write.task is None:
+            # Shutting down
+            write.api.clear_overlay(key[1], write)
+            self._finish(key, write, waiters, asyncio.CancelledError())
+
+    async def _async_send(self, key: Tuple[str, ErdCodeType], write: _PendingWrite, value: Any, waiters: List):
+        erd_code = key[1]
+        try:
+            results = await write.api.async_set_erd_values({erd_code: value})
+        except asyncio.CancelledError:
+            # If we were superseded, our waiters are now waiting on the next write
+            if write.sent_waiters is waiters:
+                self._finish(key, write, waiters, asyncio.CancelledError())
+            raise
+        except Exception as err:  # pylint: disable=broad-except
+            # Rejected before it was sent, so our value is still showing
+            write.api.clear_overlay(erd_code, write)
+            result = err
+        else:
+            result = results[erd_code]
+        self._finish(key, write, waiters, result)
+
+    def _finish(self, key: Tuple[str, ErdCodeType], write: _PendingWrite, waiters: List, result: Optional[Exception]):
+        if write.sent_waiters is waiters:
+            write.task = None
+            write.sent_value = _NO_VALUE
+            write.sent_waiters = []
+            if write.idle and self._writes.get(key) is write:
+                del self._writes[key]
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(result)
+
+    def discard(self, mac_addr: str):
+        """Drop every write for an appliance, e.g. because it's being removed."""
+        for key in [key for key in self._writes if key[0] == mac_addr]:
+            self._cancel_write(self._writes.pop(key))
+
+    def cancel(self):
+        """Drop every write."""
+        for write in self._writes.values():
+            self._cancel_write(write)
+        self._writes.clear()
+
+    @staticmethod
+    def _cancel_write(write: _PendingWrite):
+        if write.handle is not None:
+            write.handle.cancel()
+        if write.task is not None:
+            write.task.cancel()
+        for waiter in write.sent_waiters + write.waiters:
+            waiter.cancel()
@@ -0,0 +1,107 @@
+"""Coalescing scheduler for entity state writes."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set, TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+
+from .const import STATE_WRITE_DEBOUNCE
+
+if TYPE_CHECKING:
+    from .entities import GeEntity
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class StateWriteScheduler:
+    """
+    Mark entities dirty and write each one at most once per debounce window.
+
+    Appliances tend to send bursts of ERD updates (e.g. cook mode, state, temperature and timers
+    when an oven changes mode), so rather than writing state for every update, we collect the
+    dirty entities and flush them together once the window closes.  Entities are re-rendered before
+    being written, and the write is skipped entirely if nothing they show has changed.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float = STATE_WRITE_DEBOUNCE):
+        self._hass = hass
+        self.window = window
+        self._dirty = {}  # type: Dict[int, "GeEntity"]
+        self._expedited = set()  # type: Set[int]
+        self._flush_handle = None  # type: Optional[asyncio.TimerHandle]
+        self.writes_requested = 0
+        self.writes_performed = 0
+        self.writes_suppressed = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of entities waiting to be written."""
+        return len(self._dirty)
+
+    @property
+    def writes_saved(self) -> int:
+        """Number of requested writes that were avoided, either by coalescing or because nothing changed."""
+        return self.writes_requested - self.writes_performed - self.pending
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state_writes_requested": self.writes_requested,
+            "state_writes_performed": self.writes_performed,
+            "state_writes_saved": self.writes_saved,
+            "state_writes_suppressed": self.writes_suppressed,
+        }
+
+    def schedule(self, entity: "GeEntity"):
+        """Mark an entity dirty, writing it when the current window closes."""
+        self.writes_requested += 1
+        key = id(entity)
+        if key in self._expedited:
+            self._expedited.discard(key)
+            self._dirty.pop(key, None)
+            self._write(entity)
+            return
+        self._dirty[key] = entity
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(self.window, self.flush)
+
+    def expedite(self, entity: "GeEntity"):
+        """Skip the debounce window for the next write of this entity (e.g. after a user command)."""
+        self._expedited.add(id(entity))
+
+    def discard(self, entity: "GeEntity"):
+        """Forget a pending write for an entity, e.g. because it's being removed."""
+        self._dirty.pop(id(entity), None)
+        self._expedited.discard(id(entity))
+
+    def flush(self):
+        """Write all dirty entities."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        dirty, self._dirty = self._dirty, {}
+        for entity in dirty.values():
+            self._write(entity)
+
+    def cancel(self):
+        """Drop all pending writes."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._dirty.clear()
+        self._expedited.clear()
+
+    def _write(self, entity: "GeEntity"):
+        if entity.hass is None:
+            # Not added to HA (yet)
+            return
+        try:
+            if not entity.refresh_snapshot():
+                self.writes_suppressed += 1
+                return
+            _LOGGER.debug(f'Updating {entity} ({entity.unique_id}, {entity.entity_id})')
+            self.writes_performed += 1
+            entity.async_write_ha_state()
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception(f'Error writing state for {entity}')
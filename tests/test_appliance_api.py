@@ -0,0 +1,215 @@
+"""
+Tests for optimistic ERD writes: acknowledgements, rollback and failure events.
+
+Run from the repository root with Home Assistant and gekitchen installed::
+
+    python -m pytest tests
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from gekitchen import ErdCode, GeAppliance
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ge_kitchen.appliance_api import ApplianceApi  # noqa: E402
+from ge_kitchen.circuit_breaker import STATE_CLOSED, STATE_HALF_OPEN  # noqa: E402
+from ge_kitchen.const import EVENT_ERD_WRITE_FAILED  # noqa: E402
+from ge_kitchen.exceptions import ApplianceUnavailable  # noqa: E402
+from ge_kitchen.outbound_queue import OutboundQueue  # noqa: E402
+
+MAC_ADDR = "AABBCCDDEEFF"
+TIMEOUT = 0.05  # For writes that are meant to time out
+LONG_TIMEOUT = 10  # For writes that mustn't
+
+
+class FakeClient:
+    """Records the ERD writes it's asked to send, failing any listed in `errors`."""
+
+    client_priority = 0
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.sent = []
+        self.errors = {}
+
+    async def async_set_erd_value(self, appliance, erd_code, erd_value):
+        if erd_code in self.errors:
+            raise self.errors[erd_code]
+        self.sent.append((erd_code, erd_value))
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def fired():
+    return []
+
+
+@pytest.fixture
+def api(loop, fired) -> ApplianceApi:
+    hass = SimpleNamespace(
+        loop=loop,
+        async_create_task=loop.create_task,
+        bus=SimpleNamespace(async_fire=lambda event, data: fired.append((event, data))),
+    )
+    coordinator = SimpleNamespace(
+        hass=hass,
+        outbound_queue=OutboundQueue(hass),
+        write_scheduler=SimpleNamespace(schedule=lambda entity: None),
+    )
+    appliance = GeAppliance(MAC_ADDR, FakeClient(loop))
+    appliance.initialized = True
+    appliance.set_available()
+    appliance.update_erd_values({
+        ErdCode.SERIAL_NUMBER.value: "53455249414c",
+        ErdCode.SABBATH_MODE.value: "00",
+        ErdCode.TURBO_COOL_STATUS.value: "00",
+    })
+    return ApplianceApi(coordinator, appliance)
+
+
+def trip_breaker(api: ApplianceApi):
+    """Open the breaker, with a cooldown that's already over."""
+    breaker = api.circuit_breaker
+    breaker.cooldown = 0
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+
+
+def start_write(loop, api: ApplianceApi, values, timeout: float = TIMEOUT) -> asyncio.Future:
+    """Start writing, and let the write get as far as being sent."""
+    task = loop.create_task(api.async_set_erd_values(values, timeout=timeout))
+    loop.run_until_complete(asyncio.sleep(0.001))
+    return task
+
+
+def test_matching_update_acknowledges_write(loop, api, fired):
+    task = start_write(loop, api, {ErdCode.SABBATH_MODE: True}, LONG_TIMEOUT)
+    assert api.appliance.client.sent == [(ErdCode.SABBATH_MODE, "01")]
+    # Shown straight away, while the appliance still has the old value
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is True
+    assert api.appliance.get_erd_value(ErdCode.SABBATH_MODE) is False
+
+    api.acknowledge_writes({ErdCode.SABBATH_MODE.value: "01"})
+    assert loop.run_until_complete(task) == {ErdCode.SABBATH_MODE: None}
+    assert api._overlay == {}
+    assert api._pending_acks == {}
+    assert fired == []
+    assert api.circuit_breaker.failures == 0
+
+
+def test_unacknowledged_write_is_rolled_back(loop, api, fired):
+    task = start_write(loop, api, {ErdCode.SABBATH_MODE: True})
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is True
+    results = loop.run_until_complete(task)
+    assert isinstance(results[ErdCode.SABBATH_MODE], asyncio.TimeoutError)
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is False
+    assert fired == [(EVENT_ERD_WRITE_FAILED, {
+        "mac_addr": MAC_ADDR,
+        "serial_number": api.serial_number,
+        "erd_code": "SABBATH_MODE",
+        "value": "True",
+        "error": f"No acknowledgement for {ErdCode.SABBATH_MODE}",
+    })]
+    assert api.circuit_breaker.failures == 1
+
+
+def test_mismatched_update_doesnt_acknowledge_write(loop, api, fired):
+    task = start_write(loop, api, {ErdCode.SABBATH_MODE: True})
+    # e.g. an update that crossed with our write
+    api.acknowledge_writes({ErdCode.SABBATH_MODE.value: "00"})
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is True
+    results = loop.run_until_complete(task)
+    assert isinstance(results[ErdCode.SABBATH_MODE], asyncio.TimeoutError)
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is False
+    assert len(fired) == 1
+
+
+def test_batch_results_are_per_erd(loop, api, fired):
+    task = start_write(loop, api, {ErdCode.SABBATH_MODE: True, ErdCode.TURBO_COOL_STATUS: True})
+    assert len(api.appliance.client.sent) == 2
+    api.acknowledge_writes({ErdCode.TURBO_COOL_STATUS.value: "01"})
+    results = loop.run_until_complete(task)
+    assert results[ErdCode.TURBO_COOL_STATUS] is None
+    assert isinstance(results[ErdCode.SABBATH_MODE], asyncio.TimeoutError)
+    assert [data["erd_code"] for _, data in fired] == ["SABBATH_MODE"]
+
+
+def test_send_error_is_rolled_back_without_waiting(loop, api, fired):
+    error = ConnectionError("Websocket closed")
+    api.appliance.client.errors[ErdCode.SABBATH_MODE] = error
+    task = start_write(loop, api, {ErdCode.SABBATH_MODE: True})
+    assert task.done()
+    assert task.result() == {ErdCode.SABBATH_MODE: error}
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is False
+    assert [data["error"] for _, data in fired] == ["Websocket closed"]
+
+
+def test_unencodable_value_is_not_sent(loop, api, fired):
+    task = start_write(loop, api, {ErdCode.SERIAL_NUMBER: "NEW"})
+    results = loop.run_until_complete(task)
+    assert isinstance(results[ErdCode.SERIAL_NUMBER], KeyError)
+    assert api.appliance.client.sent == []
+    assert api._overlay == {}
+
+
+def test_superseded_write_doesnt_roll_back_later_one(loop, api, fired):
+    first = start_write(loop, api, {ErdCode.SABBATH_MODE: True})
+    second = start_write(loop, api, {ErdCode.SABBATH_MODE: False}, LONG_TIMEOUT)
+    # Whatever the appliance says, the latest write is what's shown
+    api.appliance.update_erd_value(ErdCode.SABBATH_MODE.value, "01")
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is False
+
+    # The first write times out while the second is still showing
+    results = loop.run_until_complete(first)
+    assert isinstance(results[ErdCode.SABBATH_MODE], asyncio.TimeoutError)
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is False
+    # It was superseded, so there's nothing to roll back or report
+    assert fired == []
+
+    api.acknowledge_writes({ErdCode.SABBATH_MODE.value: "00"})
+    assert loop.run_until_complete(second) == {ErdCode.SABBATH_MODE: None}
+    assert api._overlay == {}
+
+
+def test_cancel_writes_stops_waiting(loop, api, fired):
+    task = start_write(loop, api, {ErdCode.SABBATH_MODE: True}, LONG_TIMEOUT)
+    api.cancel_writes()
+    results = loop.run_until_complete(task)
+    assert isinstance(results[ErdCode.SABBATH_MODE], asyncio.CancelledError)
+    assert api.get_erd_value(ErdCode.SABBATH_MODE) is False
+    assert fired == []
+
+
+def test_half_open_breaker_sends_one_probe(loop, api, fired):
+    trip_breaker(api)
+    probe = start_write(loop, api, {ErdCode.SABBATH_MODE: True}, LONG_TIMEOUT)
+    other = start_write(loop, api, {ErdCode.TURBO_COOL_STATUS: True}, LONG_TIMEOUT)
+    assert isinstance(other.exception(), ApplianceUnavailable)
+    assert api.appliance.client.sent == [(ErdCode.SABBATH_MODE, "01")]
+    api.acknowledge_writes({ErdCode.SABBATH_MODE.value: "01"})
+    assert loop.run_until_complete(probe) == {ErdCode.SABBATH_MODE: None}
+    assert api.circuit_breaker.state == STATE_CLOSED
+
+
+def test_cancelled_probe_lets_another_write_probe(loop, api, fired):
+    trip_breaker(api)
+    probe = start_write(loop, api, {ErdCode.SABBATH_MODE: True}, LONG_TIMEOUT)
+    api.cancel_writes()
+    results = loop.run_until_complete(probe)
+    assert isinstance(results[ErdCode.SABBATH_MODE], asyncio.CancelledError)
+    assert api.circuit_breaker.state == STATE_HALF_OPEN
+    next_probe = start_write(loop, api, {ErdCode.SABBATH_MODE: True}, LONG_TIMEOUT)
+    assert not next_probe.done()
+    api.acknowledge_writes({ErdCode.SABBATH_MODE.value: "01"})
+    assert loop.run_until_complete(next_probe) == {ErdCode.SABBATH_MODE: None}
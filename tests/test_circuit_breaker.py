@@ -0,0 +1,151 @@
+"""
+Tests for the circuit breaker's state transitions.
+
+Run from the repository root with Home Assistant and gekitchen installed::
+
+    python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ge_kitchen.circuit_breaker import (  # noqa: E402
+    CircuitBreaker,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+)
+from ge_kitchen.exceptions import ApplianceUnavailable  # noqa: E402
+
+THRESHOLD = 3
+COOLDOWN = 30
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock) -> CircuitBreaker:
+    hass = SimpleNamespace(loop=clock)
+    return CircuitBreaker(hass, "AABBCCDDEEFF", threshold=THRESHOLD, cooldown=COOLDOWN)
+
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(THRESHOLD):
+        breaker.check(True)
+        breaker.record_failure()
+
+
+def test_closed_breaker_lets_writes_through(breaker):
+    for _ in range(THRESHOLD - 1):
+        breaker.check(True)
+        breaker.record_failure()
+    breaker.check(True)
+    breaker.record_success()
+    # Failures have to be consecutive
+    for _ in range(THRESHOLD - 1):
+        breaker.check(True)
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.check(True)
+
+
+def test_consecutive_failures_open_breaker(breaker):
+    trip(breaker)
+    assert breaker.state == STATE_OPEN
+    with pytest.raises(ApplianceUnavailable):
+        breaker.check(True)
+    assert breaker.rejected == 1
+
+
+def test_unavailable_appliance_opens_breaker(breaker):
+    with pytest.raises(ApplianceUnavailable):
+        breaker.check(False)
+    assert breaker.state == STATE_OPEN
+    # No need to wait out the cooldown once it's back
+    breaker.check(True)
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_breaker_half_opens_after_cooldown(breaker, clock):
+    trip(breaker)
+    clock.now += COOLDOWN - 1
+    with pytest.raises(ApplianceUnavailable):
+        breaker.check(True)
+    clock.now += 1
+    breaker.check(True)
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_half_open_breaker_lets_one_probe_through(breaker, clock):
+    trip(breaker)
+    clock.now += COOLDOWN
+    breaker.check(True)
+    for _ in range(3):
+        with pytest.raises(ApplianceUnavailable):
+            breaker.check(True)
+    assert breaker.rejected == 3
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_successful_probe_closes_breaker(breaker, clock):
+    trip(breaker)
+    clock.now += COOLDOWN
+    breaker.check(True)
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == 0
+    breaker.check(True)
+    breaker.check(True)
+
+
+def test_failed_probe_reopens_breaker(breaker, clock):
+    trip(breaker)
+    clock.now += COOLDOWN
+    breaker.check(True)
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    # For a whole new cooldown
+    clock.now += COOLDOWN - 1
+    with pytest.raises(ApplianceUnavailable):
+        breaker.check(True)
+    clock.now += 1
+    breaker.check(True)
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_abandoned_probe_lets_another_write_probe(breaker, clock):
+    trip(breaker)
+    clock.now += COOLDOWN
+    breaker.check(True)
+    breaker.record_abandoned()
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.check(True)
+    with pytest.raises(ApplianceUnavailable):
+        breaker.check(True)
+
+
+def test_early_check_doesnt_claim_probe(breaker, clock):
+    trip(breaker)
+    clock.now += COOLDOWN
+    breaker.check(True, probe=False)
+    breaker.check(True, probe=False)
+    # The write that's actually sent gets to probe
+    breaker.check(True)
+    with pytest.raises(ApplianceUnavailable):
+        breaker.check(True, probe=False)
@@ -0,0 +1,174 @@
+"""
+Tests for the outbound queue's token buckets and request ordering.
+
+Run from the repository root with Home Assistant and gekitchen installed::
+
+    python -m pytest tests
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ge_kitchen.outbound_queue import (  # noqa: E402
+    OutboundQueue,
+    PRIORITY_HOUSEKEEPING,
+    PRIORITY_REFRESH,
+    PRIORITY_USER,
+    TokenBucket,
+    _OutboundRequest,
+)
+
+
+START = 1000.0
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def stopped_loop(loop):
+    """A loop whose clock stays at START, so the tests control time by passing it to the queue."""
+    loop.time = lambda: START
+    return loop
+
+
+def make_queue(loop, **kwargs) -> OutboundQueue:
+    hass = SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+    return OutboundQueue(hass, **kwargs)
+
+
+def enqueue(loop, queue: OutboundQueue, name: str, priority: int, mac_addr=None, cost: int = 1):
+    request = _OutboundRequest(lambda: name, mac_addr, cost, loop.create_future(), 0)
+    queue._queues[priority].append(request)
+    return request
+
+
+def drain(queue: OutboundQueue, elapsed: float):
+    """Take every request that can go `elapsed` seconds after START, returning what they'd send."""
+    now = START + elapsed
+    sent = []
+    while True:
+        request, _ = queue._next_request(now)
+        if request is None:
+            return sent
+        sent.append(request.send())
+
+
+def test_bucket_allows_bursts_up_to_capacity():
+    bucket = TokenBucket(rate=2, capacity=3, now=0)
+    for _ in range(3):
+        assert bucket.delay(0) == 0
+        bucket.take(0)
+    assert bucket.delay(0) == pytest.approx(0.5)
+    assert bucket.delay(0.5) == 0
+
+
+def test_bucket_refills_no_further_than_capacity():
+    bucket = TokenBucket(rate=2, capacity=3, now=0)
+    bucket.take(0, 3)
+    assert bucket.delay(100, 3) == 0
+    assert bucket.tokens == 3
+
+
+def test_bucket_charges_requests_larger_than_capacity_in_full():
+    bucket = TokenBucket(rate=2, capacity=10, now=0)
+    # Too big to ever fit, so it goes as soon as the bucket is full...
+    assert bucket.delay(0, 30) == 0
+    bucket.take(0, 30)
+    # ...but has to be paid back before anything else can go
+    assert bucket.tokens == -20
+    assert bucket.delay(0) == pytest.approx(10.5)
+    assert bucket.delay(10.5) == 0
+
+
+def test_bucket_holds_average_rate_for_large_requests():
+    bucket = TokenBucket(rate=2, capacity=10, now=0)
+    now, sent = 0.0, 0
+    while now < 60:
+        delay = bucket.delay(now, 30)
+        if delay:
+            now += delay
+            continue
+        bucket.take(now, 30)
+        sent += 30
+    # One burst of capacity, then no more than the rate allows
+    assert sent <= 10 + 2 * 60 + 30
+
+
+def test_requests_go_in_priority_order(stopped_loop):
+    loop = stopped_loop
+    queue = make_queue(loop, appliance_burst=100, account_burst=100)
+    enqueue(loop, queue, "roster", PRIORITY_HOUSEKEEPING)
+    enqueue(loop, queue, "poll", PRIORITY_REFRESH, "A")
+    enqueue(loop, queue, "turn off", PRIORITY_USER, "A")
+    enqueue(loop, queue, "poll 2", PRIORITY_REFRESH, "B")
+    assert drain(queue, 0) == ["turn off", "poll", "poll 2", "roster"]
+
+
+def test_appliance_limit_lets_other_appliances_go_ahead(stopped_loop):
+    loop = stopped_loop
+    queue = make_queue(loop, appliance_rate=1, appliance_burst=1, account_burst=100)
+    enqueue(loop, queue, "A1", PRIORITY_USER, "A")
+    enqueue(loop, queue, "A2", PRIORITY_USER, "A")
+    enqueue(loop, queue, "B1", PRIORITY_REFRESH, "B")
+    assert drain(queue, 0) == ["A1", "B1"]
+    request, wait = queue._next_request(START)
+    assert request is None
+    assert wait == pytest.approx(1)
+    assert drain(queue, 1) == ["A2"]
+
+
+def test_account_limit_holds_up_everything_behind_it(stopped_loop):
+    loop = stopped_loop
+    queue = make_queue(loop, account_rate=1, account_burst=2, appliance_burst=100)
+    enqueue(loop, queue, "user", PRIORITY_USER, "A", cost=2)
+    enqueue(loop, queue, "user 2", PRIORITY_USER, "A", cost=2)
+    enqueue(loop, queue, "poll", PRIORITY_REFRESH, "B")
+    assert drain(queue, 0) == ["user"]
+    # Lower priority requests mustn't spend the tokens "user 2" is waiting on
+    assert drain(queue, 1) == []
+    assert drain(queue, 2) == ["user 2"]
+    assert drain(queue, 3) == ["poll"]
+
+
+def test_large_requests_are_charged_in_full(stopped_loop):
+    loop = stopped_loop
+    queue = make_queue(loop, appliance_rate=1, appliance_burst=10, account_burst=100)
+    enqueue(loop, queue, "big", PRIORITY_REFRESH, "A", cost=30)
+    enqueue(loop, queue, "next", PRIORITY_REFRESH, "A")
+    assert drain(queue, 0) == ["big"]
+    # 30 messages went out, so the appliance has to wait for 20 to be paid back plus 1 more
+    request, wait = queue._next_request(START)
+    assert request is None
+    assert wait == pytest.approx(21)
+    assert drain(queue, 21) == ["next"]
+
+
+def test_abandoned_requests_are_dropped(stopped_loop):
+    loop = stopped_loop
+    queue = make_queue(loop)
+    abandoned = enqueue(loop, queue, "abandoned", PRIORITY_USER, "A")
+    abandoned.future.cancel()
+    enqueue(loop, queue, "poll", PRIORITY_REFRESH, "A")
+    assert drain(queue, 0) == ["poll"]
+    assert queue.depth == 0
+
+
+def test_async_send_returns_result(loop):
+    queue = make_queue(loop)
+
+    async def send():
+        return "sent"
+
+    assert loop.run_until_complete(queue.async_send(send, PRIORITY_USER, "A")) == "sent"
+    assert queue.stats["outbound_user_sent"] == 1
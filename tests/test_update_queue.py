@@ -0,0 +1,133 @@
+"""
+Tests for the inbound update queue's fairness and coalescing.
+
+Run from the repository root with Home Assistant and gekitchen installed::
+
+    python -m pytest tests
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ge_kitchen.update_queue import InboundUpdateQueue  # noqa: E402
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def make_queue(loop, processed, **kwargs) -> InboundUpdateQueue:
+    """Make a queue that appends what it processes to `processed`."""
+    def process(ge_appliance, updates):
+        processed.append((ge_appliance.mac_addr, updates))
+
+    hass = SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+    return InboundUpdateQueue(hass, process, **kwargs)
+
+
+def appliance(mac_addr: str):
+    return SimpleNamespace(mac_addr=mac_addr)
+
+
+def run(loop, queue: InboundUpdateQueue):
+    """Process everything queued so far."""
+    if queue._consumer is not None:
+        loop.run_until_complete(queue._consumer)
+
+
+def test_appliances_take_turns(loop):
+    processed = []
+    queue = make_queue(loop, processed)
+    a, b, c = appliance("A"), appliance("B"), appliance("C")
+    queue.put(a, {"0x0001": "1"})
+    queue.put(a, {"0x0001": "2"})
+    queue.put(a, {"0x0001": "3"})
+    queue.put(b, {"0x0001": "1"})
+    queue.put(c, {"0x0001": "1"})
+    run(loop, queue)
+    # A chatty appliance doesn't hold up the others
+    assert [mac_addr for mac_addr, _ in processed] == ["A", "B", "C", "A", "A"]
+    assert [updates for mac_addr, updates in processed if mac_addr == "A"] == [
+        {"0x0001": "1"}, {"0x0001": "2"}, {"0x0001": "3"},
+    ]
+    assert queue.depth == 0
+
+
+def test_updates_are_coalesced_beyond_maxlen(loop):
+    processed = []
+    queue = make_queue(loop, processed, maxlen=2)
+    a = appliance("A")
+    queue.put(a, {"0x0001": "1"})
+    queue.put(a, {"0x0001": "2", "0x0002": "a"})
+    queue.put(a, {"0x0001": "3"})
+    queue.put(a, {"0x0002": "b", "0x0003": "x"})
+    assert queue.depth == 2
+    run(loop, queue)
+    # Later values win, and nothing new is lost
+    assert processed == [
+        ("A", {"0x0001": "1"}),
+        ("A", {"0x0001": "3", "0x0002": "b", "0x0003": "x"}),
+    ]
+
+
+def test_counters(loop):
+    processed = []
+    queue = make_queue(loop, processed, maxlen=1)
+    a = appliance("A")
+    queue.put(a, {"0x0001": "1"})
+    queue.put(a, {"0x0001": "2", "0x0002": "a"})
+    queue.put(a, {"0x0002": "b"})
+    stats = queue.stats
+    assert stats["inbound_queue_depth"] == 1
+    assert stats["inbound_updates_queued"] == 1
+    assert stats["inbound_updates_coalesced"] == 2
+    # "0x0001" was superseded once and "0x0002" once
+    assert stats["inbound_values_dropped"] == 2
+    run(loop, queue)
+    assert queue.stats["inbound_queue_depth"] == 0
+
+
+def test_queued_updates_are_copies(loop):
+    processed = []
+    queue = make_queue(loop, processed, maxlen=1)
+    a = appliance("A")
+    updates = {"0x0001": "1"}
+    queue.put(a, updates)
+    queue.put(a, {"0x0001": "2"})
+    run(loop, queue)
+    assert updates == {"0x0001": "1"}
+
+
+def test_errors_dont_stop_processing(loop):
+    processed = []
+
+    def process(ge_appliance, updates):
+        if ge_appliance.mac_addr == "A":
+            raise ValueError("Bad update")
+        processed.append(ge_appliance.mac_addr)
+
+    hass = SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+    queue = InboundUpdateQueue(hass, process)
+    queue.put(appliance("A"), {"0x0001": "1"})
+    queue.put(appliance("B"), {"0x0001": "1"})
+    run(loop, queue)
+    assert processed == ["B"]
+
+
+def test_discard_drops_an_appliances_updates(loop):
+    processed = []
+    queue = make_queue(loop, processed)
+    queue.put(appliance("A"), {"0x0001": "1"})
+    queue.put(appliance("B"), {"0x0001": "1"})
+    queue.discard("A")
+    run(loop, queue)
+    assert processed == [("B", {"0x0001": "1"})]
@@ -0,0 +1,211 @@
+"""
+Tests for coalescing, superseding and cancelling ERD writes.
+
+Run from the repository root with Home Assistant and gekitchen installed::
+
+    python -m pytest tests
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from gekitchen import ErdCode
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from ge_kitchen.exceptions import ApplianceUnavailable  # noqa: E402
+from ge_kitchen.write_coalescer import ErdWriteCoalescer  # noqa: E402
+
+ERD = ErdCode.SABBATH_MODE
+WINDOW = 0.05
+
+
+class FakeApi:
+    """Just enough of an ApplianceApi for the coalescer, sending writes that the tests resolve."""
+
+    def __init__(self, loop, mac_addr: str = "A", value: int = 0):
+        self.loop = loop
+        self.appliance = SimpleNamespace(mac_addr=mac_addr, available=True)
+        self.circuit_breaker = SimpleNamespace(check=self.check)
+        self.value = value
+        self.overlay = {}
+        self.sent = []
+        self.checks = []
+        self.rejection = None
+
+    def check(self, available: bool, probe: bool = True):
+        self.checks.append(probe)
+        if self.rejection is not None:
+            raise self.rejection
+
+    def get_erd_value(self, erd_code):
+        return self.value
+
+    def overlay_erd_value(self, erd_code, value, owner):
+        self.overlay[erd_code] = (value, owner)
+
+    def clear_overlay(self, erd_code, owner) -> bool:
+        if self.overlay.get(erd_code, (None, None))[1] is not owner:
+            return False
+        del self.overlay[erd_code]
+        return True
+
+    async def async_set_erd_values(self, values):
+        """Wait for the test to resolve the write, by setting the result of its future."""
+        future = self.loop.create_future()
+        self.sent.append((values, future))
+        return await future
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def make_coalescer(loop, **kwargs) -> ErdWriteCoalescer:
+    hass = SimpleNamespace(loop=loop, async_create_task=loop.create_task)
+    return ErdWriteCoalescer(hass, window=WINDOW, **kwargs)
+
+
+def write(loop, coalescer: ErdWriteCoalescer, api: FakeApi, update, immediate: bool = False) -> asyncio.Future:
+    return loop.create_task(coalescer.async_set_erd_value(api, ERD, update, immediate))
+
+
+def settle(loop, seconds: float = 0):
+    """Let everything that's ready run, then wait out `seconds`."""
+    loop.run_until_complete(asyncio.sleep(seconds))
+    loop.run_until_complete(asyncio.sleep(0))
+
+
+def test_rapid_writes_send_the_final_value_once(loop):
+    coalescer = make_coalescer(loop)
+    api = FakeApi(loop)
+    waiters = [write(loop, coalescer, api, lambda value: value + 1) for _ in range(3)]
+    settle(loop)
+    # Each write builds on the last, and the entity shows the latest straight away
+    assert api.overlay[ERD][0] == 3
+    assert api.sent == []
+    settle(loop, WINDOW * 2)
+    assert [values for values, _ in api.sent] == [{ERD: 3}]
+    api.sent[0][1].set_result({ERD: None})
+    settle(loop)
+    assert [waiter.result() for waiter in waiters] == [None, None, None]
+    assert coalescer.stats == {
+        "erd_writes_requested": 3,
+        "erd_writes_sent": 1,
+        "erd_writes_coalesced": 2,
+        "erd_writes_superseded": 0,
+    }
+    assert not coalescer._writes
+
+
+def test_superseded_write_hands_its_waiters_on(loop):
+    coalescer = make_coalescer(loop)
+    api = FakeApi(loop)
+    first = write(loop, coalescer, api, lambda value: value + 1, immediate=True)
+    settle(loop)
+    assert [values for values, _ in api.sent] == [{ERD: 1}]
+    first_task = coalescer._writes[("A", ERD)].task
+
+    # Builds on the value in flight, not the appliance's stale one
+    second = write(loop, coalescer, api, lambda value: value + 1, immediate=True)
+    settle(loop)
+    assert first_task.cancelled()
+    assert [values for values, _ in api.sent] == [{ERD: 1}, {ERD: 2}]
+    assert not first.done()
+    assert coalescer.writes_superseded == 1
+
+    error = asyncio.TimeoutError("No acknowledgement")
+    api.sent[1][1].set_result({ERD: error})
+    settle(loop)
+    # Both get the result of the write that carried their value
+    assert first.result() is error
+    assert second.result() is error
+    assert not coalescer._writes
+
+
+def test_failures_reach_every_waiter(loop):
+    coalescer = make_coalescer(loop)
+    api = FakeApi(loop)
+    waiters = [write(loop, coalescer, api, lambda value: value + 1) for _ in range(2)]
+    settle(loop, WINDOW * 2)
+    error = asyncio.TimeoutError("No acknowledgement")
+    api.sent[0][1].set_result({ERD: error})
+    settle(loop)
+    assert [waiter.result() for waiter in waiters] == [error, error]
+
+
+def test_errors_sending_clear_the_overlay(loop):
+    coalescer = make_coalescer(loop)
+    api = FakeApi(loop)
+    waiter = write(loop, coalescer, api, lambda value: value + 1, immediate=True)
+    settle(loop)
+    assert ERD in api.overlay
+    error = ApplianceUnavailable("A is unavailable")
+    api.sent[0][1].set_exception(error)
+    settle(loop)
+    assert waiter.result() is error
+    assert ERD not in api.overlay
+
+
+def test_breaker_rejects_before_the_debounce_window(loop):
+    coalescer = make_coalescer(loop)
+    api = FakeApi(loop)
+    api.rejection = ApplianceUnavailable("A is unavailable")
+    waiter = write(loop, coalescer, api, lambda value: value + 1)
+    settle(loop)
+    assert isinstance(waiter.exception(), ApplianceUnavailable)
+    assert api.overlay == {}
+    assert coalescer.writes_requested == 0
+    # Checking early mustn't claim a half-open breaker's probe, which is for the write that's sent
+    assert api.checks == [False]
+
+
+def test_discard_cancels_an_appliances_writes(loop):
+    coalescer = make_coalescer(loop)
+    api, other_api = FakeApi(loop, "A"), FakeApi(loop, "B")
+    in_flight = write(loop, coalescer, api, lambda value: value + 1, immediate=True)
+    settle(loop)
+    waiting = write(loop, coalescer, api, lambda value: value + 1)
+    other = write(loop, coalescer, other_api, lambda value: value + 1)
+    settle(loop)
+    coalescer.discard("A")
+    settle(loop, WINDOW * 2)
+    assert in_flight.cancelled()
+    assert waiting.cancelled()
+    # Nothing more is sent for the discarded appliance
+    assert len(api.sent) == 1
+    assert [values for values, _ in other_api.sent] == [{ERD: 1}]
+    other_api.sent[0][1].set_result({ERD: None})
+    settle(loop)
+    assert other.result() is None
+
+
+def test_cancel_drops_every_write(loop):
+    coalescer = make_coalescer(loop)
+    api = FakeApi(loop)
+    in_flight = write(loop, coalescer, api, lambda value: value + 1, immediate=True)
+    settle(loop)
+    waiting = write(loop, coalescer, api, lambda value: value + 1)
+    settle(loop)
+    coalescer.cancel()
+    settle(loop, WINDOW * 2)
+    assert in_flight.cancelled()
+    assert waiting.cancelled()
+    assert len(api.sent) == 1
+    assert not coalescer._writes
+
+
+def test_writes_after_shutdown_are_not_sent(loop):
+    coalescer = make_coalescer(loop, create_task=lambda coro: coro.close())
+    api = FakeApi(loop)
+    waiter = write(loop, coalescer, api, lambda value: value + 1, immediate=True)
+    settle(loop)
+    assert isinstance(waiter.result(), asyncio.CancelledError)
+    assert api.sent == []
+    assert api.overlay == {}